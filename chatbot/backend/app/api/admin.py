@@ -0,0 +1,39 @@
+import re
+
+from app.core.executors import run_io
+from app.core.profiling import PROFILE_SUFFIX, profiler
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+_PROFILE_ID_RE = re.compile(r"^[0-9]+-[0-9a-f]+$")
+
+
+@router.get("/profiles")
+async def list_profiles(limit: int = 50):
+    profiles = await run_io(profiler.list_profiles, limit)
+    return [
+        {key: value for key, value in profile.items() if key != "path"}
+        for profile in profiles
+    ]
+
+
+@router.get("/profiles/top")
+async def top_functions(profiles: int = 20, limit: int = 25):
+    return await run_io(profiler.top_functions, profiles, limit)
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    if not _PROFILE_ID_RE.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    def read():
+        with open(f"{profiler.directory}/{profile_id}{PROFILE_SUFFIX}") as f:
+            return f.read()
+
+    try:
+        return await run_io(read)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
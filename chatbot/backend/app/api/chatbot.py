@@ -1,82 +1,183 @@
+import json
+from datetime import datetime
 from typing import List
 
-from app.models.schemas import (AppointmentResponse, ChatRequest, ChatResponse,
+from app.chatbot_workflow import workflow_stats
+from app.core.config import settings
+from app.core.executors import run_io
+from app.models.schemas import (AppointmentResponse, ChatBatchError,
+                                ChatBatchRequest, ChatBatchResponse,
+                                ChatBatchResult, ChatRequest, ChatResponse,
                                 ServiceInfo)
 from app.services.chatbot_service import ChatbotService
-from app.tools.appointment_tool import AppointmentTool
-from fastapi import APIRouter, HTTPException
+from app.services.session_store import SessionConflictError
+from app.tools.catalog_service import etag_matches
+from app.tools.registry import registry
+from fastapi import (APIRouter, HTTPException, Request, Response, WebSocket,
+                     WebSocketDisconnect)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+SESSION_CONFLICT_DETAIL = "Session was updated by a concurrent request"
 
 router = APIRouter()
 chatbot_service = ChatbotService()
-appointment_tool = AppointmentTool()
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     try:
-        response = chatbot_service.process_message(
+        response = await chatbot_service.aprocess_message(
             message=request.message,
             user_id=request.user_id,
-            conversation_state=request.conversation_state,
+            session_id=request.session_id,
         )
         return response
+    except SessionConflictError:
+        raise HTTPException(status_code=409, detail=SESSION_CONFLICT_DETAIL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def batch_result(index, outcome):
+    if isinstance(outcome, ChatResponse):
+        return ChatBatchResult(index=index, response=outcome)
+    if isinstance(outcome, SessionConflictError):
+        error = ChatBatchError(status=409, detail=SESSION_CONFLICT_DETAIL)
+    else:
+        error = ChatBatchError(status=500, detail=str(outcome))
+    return ChatBatchResult(index=index, error=error)
+
+
+@router.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch_endpoint(batch: ChatBatchRequest, stream: bool = False):
+    """Many chat messages in one call, for bulk and offline processing.
+
+    Results are returned in request order, or with ``?stream=true`` sent
+    as NDJSON, one ChatBatchResult per line as each message finishes. A
+    message that fails gets an ``error`` instead of a ``response``; the
+    rest of the batch is unaffected.
+    """
+    if len(batch.messages) > settings.chat_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"At most {settings.chat_batch_max_items} messages "
+                "per batch"
+            ),
+        )
+    outcomes = chatbot_service.aprocess_batch(batch.messages)
+
+    if stream:
+
+        async def body():
+            async for index, outcome in outcomes:
+                yield batch_result(index, outcome).model_dump_json() + "\n"
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    results = [None] * len(batch.messages)
+    async for index, outcome in outcomes:
+        results[index] = batch_result(index, outcome)
+    return ChatBatchResponse(results=results)
+
+
+async def chat_events(request: ChatRequest, session_id=None):
+    # Errors become a final "error" event; the stream is already open
+    try:
+        async for event in chatbot_service.astream_message(
+            message=request.message,
+            user_id=request.user_id,
+            session_id=request.session_id or session_id,
+        ):
+            yield event
+    except SessionConflictError:
+        yield {
+            "event": "error",
+            "status": 409,
+            "detail": SESSION_CONFLICT_DETAIL,
+        }
+    except Exception as e:
+        yield {"event": "error", "status": 500, "detail": str(e)}
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Server-Sent Events variant of /chat."""
+
+    async def body():
+        async for event in chat_events(request):
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """Many chat messages over one connection.
+
+    Each incoming JSON message has the ChatRequest fields and is answered
+    with the same events as /chat/stream, sent as JSON messages. The
+    session from the previous message is reused unless one is given.
+    """
+    await websocket.accept()
+    session_id = None
+    try:
+        while True:
+            try:
+                request = ChatRequest.model_validate_json(
+                    await websocket.receive_text()
+                )
+            except ValidationError as e:
+                await websocket.send_json(
+                    {
+                        "event": "error",
+                        "status": 422,
+                        "detail": json.loads(e.json(include_url=False)),
+                    }
+                )
+                continue
+            async for event in chat_events(request, session_id):
+                if event["event"] == "done":
+                    session_id = event["session_id"]
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/inference/stats")
+async def get_inference_stats():
+    inference_tool = registry.inference
+    return {
+        "batching": inference_tool.batching_stats(),
+        "cache": inference_tool.cache_stats(),
+        "cascade": inference_tool.cascade_stats(),
+    }
+
+
+@router.get("/workflow/stats")
+async def get_workflow_stats():
+    return workflow_stats()
+
+
 @router.get("/services", response_model=List[ServiceInfo])
-async def get_services():
-    services = [
-        ServiceInfo(
-            name="Swedish Massage",
-            price=85,
-            duration=60,
-            description="Relaxing full-body massage",
-        ),
-        ServiceInfo(
-            name="Deep Tissue Massage",
-            price=110,
-            duration=60,
-            description="Intense massage for muscle relief",
-        ),
-        ServiceInfo(
-            name="Hot Stone Massage",
-            price=125,
-            duration=75,
-            description="Massage with heated stones",
-        ),
-        ServiceInfo(
-            name="Neck and Shoulder Massage",
-            price=65,
-            duration=30,
-            description="Targeted upper body massage",
-        ),
-        ServiceInfo(
-            name="Aromatherapy Massage",
-            price=95,
-            duration=60,
-            description="Massage with essential oils",
-        ),
-        ServiceInfo(
-            name="Thai Massage",
-            price=100,
-            duration=60,
-            description="Traditional Thai stretching massage",
-        ),
-        ServiceInfo(
-            name="Sports Massage",
-            price=120,
-            duration=60,
-            description="Massage for athletes and active people",
-        ),
-        ServiceInfo(
-            name="Prenatal Massage",
-            price=90,
-            duration=60,
-            description="Safe massage for expecting mothers",
-        ),
-    ]
-    return services
+async def get_services(request: Request):
+    # Served from the pre-encoded catalog snapshot; clients revalidate
+    # with If-None-Match and get a bodyless 304 while it is unchanged
+    catalog_service = registry.catalog
+    if catalog_service.reload_due():
+        await run_io(catalog_service.reload_if_changed)
+    snapshot = catalog_service.snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        snapshot.body, media_type="application/json", headers=headers
+    )
 
 
 @router.get(
@@ -84,7 +185,9 @@ async def get_services():
 )
 async def get_user_appointments(user_id: str):
     try:
-        appointments = appointment_tool.get_appointments(user_id)
+        appointments = await run_io(
+            registry.appointments.get_appointments, user_id
+        )
         result = []
         for appt in appointments:
             # Database structure: (id, user_id, service, date_time, status)
@@ -108,8 +211,6 @@ async def get_user_appointments(user_id: str):
                     time_part = ""
 
                 # Handle created_at datetime
-                from datetime import datetime
-
                 try:
                     created_at = datetime.fromisoformat(
                         date_time.replace(" ", "T")
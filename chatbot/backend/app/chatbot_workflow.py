@@ -1,8 +1,14 @@
+import asyncio
+import functools
+from collections import Counter
 from typing import TypedDict
 
-from app.tools.appointment_tool import AppointmentTool
-from app.tools.data_tool import DataTool
-from app.tools.inference_tool import InferenceTool
+from app.core.executors import run_cpu, run_io
+from app.core.metrics import NODE_LATENCY, timed
+from app.tools.entity_matcher import (BOOKING, GENERIC_SERVICE, SERVICE,
+                                      first_service, has_kind)
+from app.tools.intent_responses import intent_response
+from app.tools.registry import registry
 from langgraph.graph import END, START, StateGraph
 
 
@@ -13,166 +19,202 @@ class ChatState(TypedDict):
     confidence: float
     response: str
     appointment_action: str
+    appointment_id: int
     datetime: str
+    entities: list
     conversation_state: dict
+    # (intent, confidence) when the model already ran, as for /chat/batch
+    prediction: tuple
 
 
-# Initialize tools
-tool = InferenceTool()
-appt_tool = AppointmentTool()
-rag_tool = DataTool()
+# Intents handled by each optional node; anything else ends the run
+# right after intent analysis
+RETRIEVAL_INTENTS = frozenset({"pricing_inquiry"})
+APPOINTMENT_INTENTS = frozenset(
+    {"book_service", "reschedule_booking", "cancel_booking", "booking_status"}
+)
+
+# How many times each node has run since startup
+node_executions = Counter()
+
+
+def instrumented(node):
+    """Count and time each run of a node."""
+    timed_node = timed(NODE_LATENCY.labels(node.__name__))(node)
+
+    @functools.wraps(node)
+    async def wrapper(state):
+        node_executions[node.__name__] += 1
+        return await timed_node(state)
+
+    return wrapper
+
+
+def workflow_stats():
+    return {
+        "node_executions": {
+            name: node_executions[name] for name in graph.nodes
+        }
+    }
 
 
 # Define nodes
-def intent_analysis(state: ChatState):
-    result = tool.predict_and_respond(state["query"])
-    state["intent"] = result["intent"]
-    state["confidence"] = result["confidence"]
-    state["response"] = result["response"]
-
-    # Improve intent detection with keyword fallback
-    query_lower = state["query"].lower()
-
-    # Check for booking keywords
-    booking_keywords = ["book", "schedule", "appointment", "reserve"]
-    service_keywords = [
-        "massage",
-        "thai",
-        "swedish",
-        "deep tissue",
-        "hot stone",
-    ]
-
-    if any(word in query_lower for word in booking_keywords) and any(
-        word in query_lower for word in service_keywords
+async def intent_analysis(state: ChatState):
+    if state.get("prediction") is not None:
+        result = intent_response(*state["prediction"])
+    else:
+        result = await registry.inference.apredict_and_respond(state["query"])
+    update = {
+        "intent": result["intent"],
+        "confidence": result["confidence"],
+        "response": result["response"],
+    }
+
+    # Improve intent detection with keyword fallback. The entities found
+    # here are reused by the later nodes instead of rescanning the query.
+    entities = registry.data.matcher.scan(state["query"])
+    update["entities"] = entities
+
+    if has_kind(entities, BOOKING) and has_kind(
+        entities, SERVICE, GENERIC_SERVICE
     ):
-        state["intent"] = "book_service"
-        state["response"] = "I'd be happy to help you book that massage!"
+        update["intent"] = "book_service"
+        update["response"] = "I'd be happy to help you book that massage!"
 
     # Check conversation state for pending actions
     if state.get("conversation_state", {}).get("pending") == "reschedule":
-        state["intent"] = "provide_datetime"
+        update["intent"] = "provide_datetime"
 
-    return state
+    return update
 
 
-def data_retrieval(state: ChatState):
-    if state["intent"] == "pricing_inquiry":
-        rag_result = rag_tool.retrieve_and_generate(state["query"])
-        state["response"] = rag_result
-    return state
+def route_intent(state: ChatState):
+    intent = state["intent"]
+    if intent in RETRIEVAL_INTENTS:
+        return "data_retrieval"
+    if intent in APPOINTMENT_INTENTS:
+        return "appointment_trigger"
+    if (
+        intent == "confirm"
+        and state.get("conversation_state", {}).get("pending") == "reschedule"
+    ):
+        return "appointment_trigger"
+    return END
+
 
+async def data_retrieval(state: ChatState):
+    rag_result = await run_cpu(
+        registry.data.retrieve_and_generate,
+        state["query"],
+        state.get("entities"),
+    )
+    return {"response": rag_result}
 
-def appointment_trigger(state: ChatState):
+
+async def appointment_trigger(state: ChatState):
     user_id = state.get("conversation_state", {}).get("user_id", "user123")
+    update = {}
 
     if state["intent"] in [
         "book_service",
         "reschedule_booking",
         "cancel_booking",
     ]:
-        state["appointment_action"] = state["intent"]
-        state["datetime"] = (
-            tool.extract_datetime(state["query"]) or "Not extracted"
+        update["appointment_action"] = state["intent"]
+        update["datetime"] = (
+            await run_cpu(registry.inference.extract_datetime, state["query"])
+            or "Not extracted"
         )
 
         if state["intent"] == "book_service":
             # Extract service type from query
-            query_lower = state["query"].lower()
-            service = "General Massage"  # Default
-
-            if "thai" in query_lower:
-                service = "Thai Massage"
-            elif "swedish" in query_lower:
-                service = "Swedish Massage"
-            elif "deep tissue" in query_lower:
-                service = "Deep Tissue Massage"
-            elif "hot stone" in query_lower:
-                service = "Hot Stone Massage"
-            elif "neck" in query_lower or "shoulder" in query_lower:
-                service = "Neck and Shoulder Massage"
-            elif "aromatherapy" in query_lower:
-                service = "Aromatherapy Massage"
-            elif "sports" in query_lower:
-                service = "Sports Massage"
-            elif "prenatal" in query_lower:
-                service = "Prenatal Massage"
-
-            result = appt_tool.add_appointment(
-                user_id, service, state["datetime"]
-            )
-            appointments = appt_tool.get_appointments(user_id)
-            latest_appt_id = (
-                max([appt[0] for appt in appointments]) if appointments else 1
+            service = first_service(state.get("entities", ()))
+            if service is None:
+                service = "General Massage"  # Default
+
+            appointment_id = await run_io(
+                registry.appointments.create_appointment,
+                user_id,
+                service,
+                update["datetime"],
             )
-            state["response"] = (
-                f"Great! Appointment #{latest_appt_id} booked successfully for {service} on {state['datetime']}."
+            update["appointment_id"] = appointment_id
+            update["response"] = (
+                f"Great! Appointment #{appointment_id} booked successfully for {service} on {update['datetime']}."
             )
 
         elif state["intent"] == "reschedule_booking":
-            appointments = appt_tool.get_appointments(user_id)
-            pending_appointments = [
-                appt for appt in appointments if appt[4] == "pending"
-            ]
-            if pending_appointments:
-                appointment_id = pending_appointments[-1][0]
-                result = appt_tool.reschedule_appointment(
-                    appointment_id, state["datetime"]
+            pending = await run_io(
+                registry.appointments.get_latest_pending_appointment, user_id
+            )
+            if pending:
+                appointment_id = pending[0]
+                result = await run_io(
+                    registry.appointments.reschedule_appointment,
+                    appointment_id,
+                    update["datetime"],
                 )
-                state["response"] = (
-                    f"Appointment #{appointment_id} rescheduled successfully to {state['datetime']}."
+                update["appointment_id"] = appointment_id
+                update["response"] = (
+                    f"Appointment #{appointment_id} rescheduled successfully to {update['datetime']}."
                 )
             else:
-                state["response"] = (
+                update["response"] = (
                     "No pending appointments found to reschedule."
                 )
 
         elif state["intent"] == "cancel_booking":
-            appointments = appt_tool.get_appointments(user_id)
-            pending_appointments = [
-                appt for appt in appointments if appt[4] == "pending"
-            ]
-            if pending_appointments:
-                appointment_id = pending_appointments[-1][0]
-                result = appt_tool.cancel_appointment(appointment_id)
-                state["response"] = "Appointment cancelled successfully."
+            pending = await run_io(
+                registry.appointments.get_latest_pending_appointment, user_id
+            )
+            if pending:
+                appointment_id = pending[0]
+                result = await run_io(
+                    registry.appointments.cancel_appointment, appointment_id
+                )
+                update["appointment_id"] = appointment_id
+                update["response"] = "Appointment cancelled successfully."
             else:
-                state["response"] = "No pending appointments found to cancel."
+                update["response"] = "No pending appointments found to cancel."
 
     elif state["intent"] == "booking_status":
-        appointments = appt_tool.get_appointments(user_id)
-        if appointments:
-            count = len(appointments)
-            latest = appointments[-1]
-            state["response"] = (
+        count, latest = await run_io(
+            registry.appointments.get_appointment_summary, user_id
+        )
+        if latest:
+            update["response"] = (
                 f"You have {count} booking(s). Your most recent: {latest[2]} on {latest[3]} (Status: {latest[4]})"
             )
         else:
-            state["response"] = "You have no bookings yet."
+            update["response"] = "You have no bookings yet."
     elif state["intent"] == "confirm":
         if state.get("conversation_state", {}).get("pending") == "reschedule":
             # Perform reschedule
-            result = appt_tool.reschedule_appointment(1, state["datetime"])
-            state["response"] = (
+            result = await run_io(
+                registry.appointments.reschedule_appointment,
+                1,
+                state["datetime"],
+            )
+            update["response"] = (
                 f"Sent reschedule information to pro, you will get notified once it's confirmed. {result}"
             )
-            state["conversation_state"] = {}
-    elif state["intent"] == "reschedule_booking":
-        state["response"] = (
-            "Sure, let's reschedule. Provide the new date and time."
-        )
-        state["conversation_state"] = {"pending": "reschedule"}
-    return state
+            update["conversation_state"] = {}
+    return update
 
 
-# Build graph
+# Build graph. Each node returns only the keys it changes, and only the
+# nodes the intent needs are run.
 graph = StateGraph(ChatState)
-graph.add_node("intent_analysis", intent_analysis)
-graph.add_node("data_retrieval", data_retrieval)
-graph.add_node("appointment_trigger", appointment_trigger)
+graph.add_node("intent_analysis", instrumented(intent_analysis))
+graph.add_node("data_retrieval", instrumented(data_retrieval))
+graph.add_node("appointment_trigger", instrumented(appointment_trigger))
 graph.add_edge(START, "intent_analysis")
-graph.add_edge("intent_analysis", "data_retrieval")
-graph.add_edge("data_retrieval", "appointment_trigger")
+graph.add_conditional_edges(
+    "intent_analysis",
+    route_intent,
+    ["data_retrieval", "appointment_trigger", END],
+)
+graph.add_edge("data_retrieval", END)
 graph.add_edge("appointment_trigger", END)
 
 # Compile and run
@@ -181,5 +223,5 @@ compiled_graph = graph.compile()
 # Example usage
 if __name__ == "__main__":
     state = {"query": "Can I reschedule my booking?", "conversation_state": {}}
-    result = compiled_graph.invoke(state)
+    result = asyncio.run(compiled_graph.ainvoke(state))
     print(result)
\ No newline at end of file
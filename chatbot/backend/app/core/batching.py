@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app.core.metrics import QUEUE_DEPTH
+
+
+class MicroBatcher:
+    """Collects concurrent single-item calls into batched calls.
+
+    A batch is flushed when it reaches ``max_batch_size``, when no new item
+    arrives within ``window_ms``, or when the oldest item has waited
+    ``max_wait_ms``, whichever happens first.
+    """
+
+    def __init__(
+        self,
+        process_batch,
+        max_batch_size=32,
+        window_ms=5.0,
+        max_wait_ms=20.0,
+        name="micro-batcher",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        QUEUE_DEPTH.labels(name).set_function(self.queue_depth)
+
+    def submit_future(self, item):
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((item, time.perf_counter(), future))
+        return future
+
+    def submit(self, item):
+        return self.submit_future(item).result()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._batches = 0
+            self._items = 0
+            self._max_batch = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+            self._batch_sizes = {}
+
+    def stats(self):
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "batches": batches,
+                "items": items,
+                "avg_batch_size": items / batches if batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "batch_size_histogram": dict(
+                    sorted(self._batch_sizes.items())
+                ),
+                "avg_queue_wait_ms": (
+                    self._wait_total / items * 1000.0 if items else 0.0
+                ),
+                "max_queue_wait_ms": self._wait_max * 1000.0,
+                "queue_depth": self.queue_depth(),
+            }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[1] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = min(self.window, deadline - time.perf_counter())
+            if timeout <= 0:
+                # Drain whatever is already queued without waiting further
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [entry[0] for entry in batch]
+            try:
+                results = list(self.process_batch(items))
+                if len(results) != len(batch):
+                    # zip() would leave the unmatched callers waiting
+                    raise RuntimeError(
+                        f"{self.name}: batch of {len(batch)} items returned "
+                        f"{len(results)} results"
+                    )
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            self._record(batch, started)
+
+    def _record(self, batch, started):
+        waits = [started - enqueued for _, enqueued, _ in batch]
+        size = len(batch)
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._max_batch = max(self._max_batch, size)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
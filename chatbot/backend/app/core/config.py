@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -11,13 +11,128 @@ class Settings(BaseSettings):
 
     # Database
     database_url: Optional[str] = None
+    appointments_db_path: str = "appointments.db"
+    sqlite_pool_size: int = 8
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 8192
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cached_statements: int = 128
 
     # AI/ML Settings
     openai_api_key: Optional[str] = None
     model_name: str = "gpt-3.5-turbo"
 
+    # Worker pools for CPU-bound work and blocking I/O on the chat path
+    cpu_executor_workers: int = 4
+    io_executor_workers: int = 8
+
+    # Pre-fork launcher (python -m app.serve). The model is loaded once in
+    # the master and, with share_model_memory, its weights are moved to
+    # shared memory before the workers are forked. worker_torch_threads
+    # defaults to the CPU count divided by the number of workers.
+    workers: int = 1
+    worker_torch_threads: Optional[int] = None
+    share_model_memory: bool = True
+
+    # Intent model: an artifact directory or a legacy .pkl; defaults to
+    # app/model/chatbot_model if it exists, else app/model/chatbot_model.pkl
+    model_path: Optional[str] = None
+
+    # Intent inference batching
+    inference_batching_enabled: bool = True
+    inference_batch_max_size: int = 32
+    inference_batch_window_ms: float = 2.0
+    inference_batch_max_wait_ms: float = 10.0
+    # "dynamic" pads each length bucket to its longest query,
+    # "max_length" pads everything to inference_max_length
+    inference_padding: str = "dynamic"
+    inference_max_length: int = 128
+    inference_length_buckets: List[int] = [16, 32, 64, 128]
+
+    # "torch" or "onnx"; the onnx backend exports (and by default int8
+    # quantizes) the model next to the artifact on first use, as
+    # <model>.int8.onnx or <model>.fp32.onnx, and again whenever the
+    # artifact or onnx_quantize changes
+    inference_backend: str = "torch"
+    onnx_model_path: Optional[str] = None
+    onnx_quantize: bool = True
+    onnx_num_threads: Optional[int] = None
+
+    # Batch run through the intent model before the app reports ready
+    warmup_enabled: bool = True
+    warmup_batch_size: int = 8
+
+    # "local" runs the intent model in the API process; "remote" sends
+    # model calls to python -m app.inference_server over a unix socket.
+    # inference_server_workers is the size of the server's process pool,
+    # inference_remote_connections the connections each API process opens.
+    inference_mode: str = "local"
+    inference_socket_path: str = "/tmp/chatbot-inference.sock"
+    inference_server_workers: int = 1
+    inference_remote_connections: int = 2
+    inference_remote_timeout_s: float = 30.0
+    inference_remote_connect_timeout_s: float = 60.0
+
+    # Service catalog: defaults to app/dataset/simple_dataset.csv, which is
+    # checked for changes at most every catalog_reload_check_s seconds
+    services_csv_path: Optional[str] = None
+    catalog_reload_check_s: float = 2.0
+
+    # Embedding search over the service catalog, used for pricing
+    # questions that no service name matches. semantic_min_score=None
+    # calibrates the threshold for the encoder in use at startup
+    semantic_search_enabled: bool = True
+    semantic_top_k: int = 3
+    semantic_min_score: Optional[float] = None
+
+    # Intent prediction cache (0 disables it); the model artifact is
+    # checked for changes at most every model_reload_check_s seconds
+    intent_cache_size: int = 2048
+    intent_cache_ttl_s: Optional[float] = None
+    model_reload_check_s: float = 5.0
+
+    # Booking date/time extraction; dateutil's fuzzy parser is only used
+    # when none of the built-in patterns match
+    datetime_cache_size: int = 1024
+    datetime_dateutil_fallback: bool = True
+
+    # TF-IDF first tier for intent classification; messages it scores
+    # below its calibrated threshold are escalated to the transformer
+    intent_cascade_enabled: bool = True
+    intent_cascade_data_path: Optional[str] = None
+    intent_cascade_target_precision: float = 0.95
+
+    # POST /chat/batch: the most messages per call, and how many of them
+    # run through the workflow at once
+    chat_batch_max_items: int = 1000
+    chat_batch_concurrency: int = 16
+
+    # Server-side conversation sessions. With session_db_path set they are
+    # written through to sqlite and shared between worker processes.
+    session_cache_size: int = 10000
+    session_ttl_s: float = 3600.0
+    session_db_path: Optional[str] = None
+
+    # Latency histograms and counters served at /metrics
+    metrics_enabled: bool = True
+
+    # Request profiling under profiling_path_prefix. When enabled, requests
+    # sent with an "X-Profile: 1" header are profiled, as is every
+    # profiling_sample_every-th request (0 turns sampling off). At most one
+    # profile is taken at a time and at most one per
+    # profiling_min_interval_s; the newest profiling_max_files are kept.
+    profiling_enabled: bool = False
+    profiling_dir: str = "profiles"
+    profiling_path_prefix: str = "/api/v1/chat"
+    profiling_interval_ms: float = 5.0
+    profiling_sample_every: int = 0
+    profiling_min_interval_s: float = 1.0
+    profiling_max_files: int = 200
+
     class Config:
         env_file = ".env"
+        # Allow model_* field names without pydantic namespace warnings
+        protected_namespaces = ("settings_",)
 
 
 settings = Settings()
\ No newline at end of file
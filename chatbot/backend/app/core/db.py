@@ -0,0 +1,131 @@
+import os
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+_pools = weakref.WeakSet()
+# Connections a forked child inherited while they were checked out. They
+# are never used or closed in the child: closing one would release this
+# process's POSIX locks on the database file.
+_inherited = []
+
+
+class SQLitePool:
+    """Thread-safe pool of long-lived sqlite3 connections.
+
+    Connections are opened lazily up to ``size`` and reused, so each one
+    keeps its own prepared statement cache across calls. Every connection
+    runs in WAL mode, which lets readers proceed while a write is in
+    progress.
+
+    Pools are fork-safe: idle connections are closed before a fork and
+    the child starts with an empty pool, so connections are only ever
+    opened lazily in the process that uses them.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        size=None,
+        busy_timeout_ms=None,
+        cache_size_kb=None,
+        synchronous=None,
+        cached_statements=None,
+    ):
+        self.db_path = db_path
+        self.size = size or settings.sqlite_pool_size
+        self.busy_timeout_ms = (
+            busy_timeout_ms or settings.sqlite_busy_timeout_ms
+        )
+        self.cache_size_kb = cache_size_kb or settings.sqlite_cache_size_kb
+        self.synchronous = synchronous or settings.sqlite_synchronous
+        self.cached_statements = (
+            cached_statements or settings.sqlite_cached_statements
+        )
+
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        _pools.add(self)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        """Yield a pooled connection inside a transaction.
+
+        The transaction is committed when the block exits normally and
+        rolled back if it raises.
+        """
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+
+    def _after_fork(self):
+        while True:
+            try:
+                _inherited.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+
+def _close_pools_before_fork():
+    for pool in list(_pools):
+        pool.close()
+
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._after_fork()
+
+
+os.register_at_fork(
+    before=_close_pools_before_fork,
+    after_in_child=_reset_pools_after_fork,
+)
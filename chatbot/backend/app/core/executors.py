@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH
+
+
+# CPU-bound work (model calls, date parsing, pandas) and blocking I/O
+# (sqlite) get separate bounded pools so that neither can starve the
+# other, and neither ever runs on the event loop. Both pools queue
+# submissions FIFO, so waiting requests are served in arrival order.
+def _create_executors():
+    global cpu_executor, io_executor
+    cpu_executor = ThreadPoolExecutor(
+        max_workers=settings.cpu_executor_workers, thread_name_prefix="cpu"
+    )
+    io_executor = ThreadPoolExecutor(
+        max_workers=settings.io_executor_workers, thread_name_prefix="io"
+    )
+
+    # Submissions waiting for a free worker thread
+    QUEUE_DEPTH.labels("cpu_executor").set_function(
+        cpu_executor._work_queue.qsize
+    )
+    QUEUE_DEPTH.labels("io_executor").set_function(
+        io_executor._work_queue.qsize
+    )
+
+
+_create_executors()
+# Worker threads do not survive fork(), but they would still count
+# against max_workers in the child, so forked processes get fresh pools.
+os.register_at_fork(after_in_child=_create_executors)
+
+
+async def run_in_executor(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(fn, *args, **kwargs)
+    )
+
+
+async def run_cpu(fn, *args, **kwargs):
+    return await run_in_executor(cpu_executor, fn, *args, **kwargs)
+
+
+async def run_io(fn, *args, **kwargs):
+    return await run_in_executor(io_executor, fn, *args, **kwargs)
@@ -0,0 +1,278 @@
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from app.core.config import settings
+from app.core.executors import run_io
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_SUFFIX = ".collapsed"
+
+# Leaf frames of threads that are blocked waiting for work; sampling them
+# would only show idle time
+IDLE_LEAVES = frozenset(
+    {
+        ("threading.py", "wait"),
+        ("threading.py", "_wait_for_tstate_lock"),
+        ("selectors.py", "select"),
+        # ThreadPoolExecutor workers blocked on their (C) work queue
+        ("thread.py", "_worker"),
+    }
+)
+
+
+def _frame_label(code):
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    """Frames of one stack, outermost first."""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return codes
+
+
+class StackSampler:
+    """Samples the Python stacks of all threads at a fixed interval.
+
+    Stacks are counted in collapsed form ("thread;outer;...;leaf"), the
+    input format of flamegraph.pl and speedscope. Threads parked in a
+    wait or select are skipped.
+    """
+
+    def __init__(self, interval_s):
+        self.interval_s = interval_s
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Signal the sampler thread to stop, without waiting for it."""
+        self._stop.set()
+
+    def join(self):
+        """Wait for the sampler thread to stop; returns the counts."""
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                codes = _collapse(frame)
+                leaf = codes[-1]
+                if (
+                    os.path.basename(leaf.co_filename),
+                    leaf.co_name,
+                ) in IDLE_LEAVES:
+                    continue
+                stack = ";".join(
+                    [names.get(ident, str(ident))]
+                    + [_frame_label(code) for code in codes]
+                )
+                self.counts[stack] += 1
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles.
+
+    A request is profiled when it carries the profile header or is the
+    N-th one under 1-in-N sampling, but never while another profile is
+    being taken nor sooner than ``min_interval_s`` after the previous
+    one, so the overhead stays bounded however much traffic arrives.
+    """
+
+    def __init__(
+        self,
+        directory,
+        interval_ms=5.0,
+        sample_every=0,
+        min_interval_s=1.0,
+        max_files=200,
+    ):
+        self.directory = directory
+        self.interval_s = interval_ms / 1000.0
+        self.sample_every = sample_every
+        self.min_interval_s = min_interval_s
+        self.max_files = max_files
+        self._requests = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = False
+        self._next_allowed = 0.0
+
+    def try_begin(self, forced):
+        sampled = (
+            self.sample_every > 0
+            and next(self._requests) % self.sample_every == 0
+        )
+        if not (forced or sampled):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._active or now < self._next_allowed:
+                return None
+            self._active = True
+            self._next_allowed = now + self.min_interval_s
+        sampler = StackSampler(self.interval_s)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler):
+        """Stop ``sampler`` and let the next profile begin; never blocks."""
+        sampler.stop()
+        with self._lock:
+            self._active = False
+
+    def write(self, profile_id, sampler):
+        """Store the profile of a finished ``sampler``; blocking."""
+        counts = sampler.join()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile_id + PROFILE_SUFFIX)
+        with open(path, "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        self._prune()
+        return path
+
+    def _prune(self):
+        profiles = self.list_profiles()
+        for profile in profiles[self.max_files :]:
+            try:
+                os.remove(profile["path"])
+            except OSError:
+                pass
+
+    def list_profiles(self, limit=None):
+        """Stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(PROFILE_SUFFIX):
+                stat = entry.stat()
+                profiles.append(
+                    {
+                        "id": entry.name[: -len(PROFILE_SUFFIX)],
+                        "path": entry.path,
+                        "created": stat.st_mtime,
+                        "size_bytes": stat.st_size,
+                    }
+                )
+        profiles.sort(key=lambda profile: profile["created"], reverse=True)
+        return profiles[:limit] if limit else profiles
+
+    def top_functions(self, profiles=20, limit=25):
+        """Hottest frames across the most recent ``profiles`` profiles.
+
+        ``self`` counts samples where the frame was the leaf, ``total``
+        samples where it was anywhere on the stack.
+        """
+        own, total, samples = Counter(), Counter(), 0
+        used = self.list_profiles(profiles)
+        for profile in used:
+            with open(profile["path"]) as f:
+                for line in f:
+                    stack, _, count = line.rstrip("\n").rpartition(" ")
+                    if not stack:
+                        continue
+                    count = int(count)
+                    # The first element is the thread name
+                    frames = stack.split(";")[1:]
+                    if not frames:
+                        continue
+                    samples += count
+                    own[frames[-1]] += count
+                    for frame in set(frames):
+                        total[frame] += count
+        return {
+            "profiles": len(used),
+            "samples": samples,
+            "functions": [
+                {
+                    "function": frame,
+                    "self": count,
+                    "self_pct": 100.0 * count / samples,
+                    "total": total[frame],
+                    "total_pct": 100.0 * total[frame] / samples,
+                }
+                for frame, count in own.most_common(limit)
+            ],
+        }
+
+
+profiler = RequestProfiler(
+    settings.profiling_dir,
+    interval_ms=settings.profiling_interval_ms,
+    sample_every=settings.profiling_sample_every,
+    min_interval_s=settings.profiling_min_interval_s,
+    max_files=settings.profiling_max_files,
+)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling selected requests under ``path_prefix``.
+
+    Profiled responses carry an ``X-Profile-Id`` header naming the stored
+    profile. The profile covers the whole process while the request is in
+    flight, so work done for overlapping requests shows up too.
+    """
+
+    def __init__(self, app, path_prefix=None, profiler=profiler):
+        self.app = app
+        self.path_prefix = path_prefix or settings.profiling_path_prefix
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(
+            self.path_prefix
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        forced = any(
+            name == PROFILE_HEADER and value not in (b"", b"0")
+            for name, value in scope["headers"]
+        )
+        sampler = self.profiler.try_begin(forced)
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", []))
+                    + [(PROFILE_ID_HEADER, profile_id.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Joining the sampler thread waits for its last sample, so that
+            # happens in write(), on the I/O pool
+            self.profiler.finish(sampler)
+            await run_io(self.profiler.write, profile_id, sampler)
@@ -0,0 +1,45 @@
+import json
+
+# WebSocket close code for "try again later"
+TRY_AGAIN_LATER = 1013
+
+
+class ReadinessMiddleware:
+    """ASGI middleware turning requests away until the app is ready.
+
+    Requests under ``path_prefix`` get a 503 with Retry-After (WebSockets
+    are closed) while ``is_ready()`` is false. Everything else, such as
+    /health and /ready, is always passed through.
+    """
+
+    def __init__(self, app, is_ready, path_prefix="/api/", retry_after_s=5):
+        self.app = app
+        self.is_ready = is_ready
+        self.path_prefix = path_prefix
+        self.retry_after_s = retry_after_s
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] not in ("http", "websocket")
+            or not scope["path"].startswith(self.path_prefix)
+            or self.is_ready()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": TRY_AGAIN_LATER})
+            return
+        body = json.dumps({"detail": "Service is starting"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after_s).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,171 @@
+"""Standalone inference server for inference_mode="remote".
+
+    python -m app.inference_server --workers 2 \\
+        --socket /tmp/chatbot-inference.sock
+
+Owns the InferenceTool so that API processes neither load the model nor
+compete with it for the GIL. The model is loaded once and the worker pool
+is forked from it as in app.serve. Each worker accepts on the shared unix
+socket and serves any number of pipelined requests per connection (see
+app.tools.remote_inference for the protocol). Concurrent requests from all
+connections a worker holds, whichever API process they come from, go
+through the same intent batcher.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import signal
+import socket
+import time
+
+from app.core.config import settings
+from app.core.executors import run_cpu
+from app.serve import Master, init_worker, preload_tool, worker_torch_threads
+from app.tools.remote_inference import (EMBED, ERROR, PREDICT,
+                                        PREDICT_BATCH, STATS, decode_texts,
+                                        encode_frame, encode_matrix,
+                                        encode_prediction, encode_predictions,
+                                        read_frame)
+
+logger = logging.getLogger("app.inference_server")
+
+
+def bind_unix_socket(path, backlog=2048):
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Left behind by a server that did not shut down cleanly
+            os.unlink(path)
+        else:
+            raise RuntimeError(f"An inference server is already on {path}")
+        finally:
+            probe.close()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class InferenceServer:
+    def __init__(self, tool):
+        self.tool = tool
+
+    async def handle(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                request_id, op, payload = await read_frame(reader)
+                task = asyncio.create_task(
+                    self.dispatch(writer, request_id, op, payload)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            logger.warning("Closing connection: %s", e)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def dispatch(self, writer, request_id, op, payload):
+        try:
+            reply = await self.reply(op, payload)
+        except Exception as e:
+            logger.exception("Request %d (op %d) failed", request_id, op)
+            op, reply = ERROR, str(e).encode()
+        if not writer.is_closing():
+            writer.write(encode_frame(request_id, op, reply))
+
+    async def reply(self, op, payload):
+        if op == PREDICT:
+            label, confidence = await self.tool.apredict_intent(
+                payload.decode()
+            )
+            return encode_prediction(label, confidence)
+        if op == PREDICT_BATCH:
+            return encode_predictions(
+                await self.tool.apredict_intent_batch(decode_texts(payload))
+            )
+        if op == EMBED:
+            return encode_matrix(
+                await run_cpu(self.tool.embed, decode_texts(payload))
+            )
+        if op == STATS:
+            return json.dumps(self.stats()).encode()
+        raise ValueError(f"Unknown op code: {op}")
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "model_version": list(self.tool.model_version),
+            "batching": self.tool.batching_stats(),
+            "cache": self.tool.cache_stats(),
+            "cascade": self.tool.cascade_stats(),
+        }
+
+    async def serve(self, sock):
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = await asyncio.start_unix_server(self.handle, sock=sock)
+        logger.info("Worker [%d] serving", os.getpid())
+        await stop.wait()
+        server.close()
+        await server.wait_closed()
+
+
+def run_worker(tool, sock, torch_threads):
+    init_worker(torch_threads)
+    asyncio.run(InferenceServer(tool).serve(sock))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve intent inference over a unix socket"
+    )
+    parser.add_argument("--socket", default=settings.inference_socket_path)
+    parser.add_argument(
+        "--workers", type=int, default=settings.inference_server_workers
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(levelname)s:     [%(process)d] %(message)s",
+    )
+
+    workers = max(1, args.workers)
+    torch_threads = worker_torch_threads(workers)
+
+    sock = bind_unix_socket(args.socket)
+    started = time.perf_counter()
+    tool = preload_tool()
+    logger.info(
+        "Loaded model in %.1fs; forking %d workers with %d torch threads each",
+        time.perf_counter() - started,
+        workers,
+        torch_threads,
+    )
+    try:
+        Master(
+            functools.partial(run_worker, tool, sock, torch_threads), workers
+        ).run()
+    finally:
+        sock.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,57 @@
-from app.api import chatbot
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from app.api import admin, chatbot
 from app.core.config import settings
-from fastapi import FastAPI
+from app.core.metrics import CONTENT_TYPE, REGISTRY, InFlightMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.readiness import ReadinessMiddleware
+from app.tools.registry import registry
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger("uvicorn.error")
+
+
+async def start_tools():
+    try:
+        await registry.astart()
+    except Exception:
+        logger.exception("Tool startup failed")
+        return
+    logger.info(
+        "Tools ready in %.2fs (%s)",
+        registry.time_to_ready_s,
+        ", ".join(
+            f"{name} {seconds:.2f}s"
+            for name, seconds in registry.timings.items()
+        ),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # The tools load in the background so that /health answers at once;
+    # /ready and the API wait for them
+    startup = None
+    if registry.ready:
+        logger.info(
+            "Tools ready (preloaded in %.2fs)", registry.time_to_ready_s
+        )
+    else:
+        startup = asyncio.create_task(start_tools())
+    yield
+    if startup is not None:
+        startup.cancel()
+
 
 app = FastAPI(
     title="Customer Support Chatbot API",
     description="Backend API for Customer Support Chatbot",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,7 +62,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(InFlightMiddleware)
+app.add_middleware(ReadinessMiddleware, is_ready=lambda: registry.ready)
+
 app.include_router(chatbot.router, prefix="/api/v1", tags=["chatbot"])
+# The admin endpoints only serve profiles, so they exist only with profiling
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
@@ -26,4 +78,18 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    # Liveness only; see /ready
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+def readiness_check():
+    status = registry.status()
+    if not registry.ready:
+        return JSONResponse(status, status_code=503)
+    return status
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -12,18 +12,40 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
-    user_id: str
-    conversation_state: Optional[Dict[str, Any]] = {}
+    # Used only when a new session is started; afterwards the user is the
+    # one the session belongs to
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
     response: str
     intent: str
     confidence: float
-    conversation_state: Dict[str, Any]
+    session_id: str
     timestamp: datetime
 
 
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatRequest]
+
+
+class ChatBatchError(BaseModel):
+    status: int
+    detail: str
+
+
+class ChatBatchResult(BaseModel):
+    # Position of the message in the request
+    index: int
+    response: Optional[ChatResponse] = None
+    error: Optional[ChatBatchError] = None
+
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchResult]
+
+
 class AppointmentCreate(BaseModel):
     service_type: str
     date: str
@@ -0,0 +1,207 @@
+"""Pre-fork launcher: load the app once, then fork the worker processes.
+
+    python -m app.serve --workers 4 --host 0.0.0.0 --port 8000
+
+``uvicorn --workers N`` starts N fresh interpreters that each import the
+app and load their own copy of the model, TF-IDF cascade and catalog
+embeddings. Here the master imports the app once, moves the model weights
+to shared memory and freezes the garbage collector's view of the heap
+before forking, so the workers share those pages copy-on-write instead of
+each holding a private copy. All workers accept on one listening socket
+bound by the master.
+
+The master does not serve requests itself. It restarts workers that exit
+unexpectedly and passes SIGINT/SIGTERM on to them for a graceful shutdown.
+
+With a single worker there is nothing to share, so the app is served in
+this process as by plain uvicorn: the tools load in the background and
+/health answers meanwhile.
+"""
+
+import argparse
+import functools
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+import torch
+import uvicorn
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def bind_socket(host, port, backlog=2048):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _begin_preload():
+    # Collection is off while the model loads so that no long-lived object
+    # is moved between generations. The master keeps torch to a single
+    # intra-op thread because OpenMP thread pools do not survive fork().
+    gc.disable()
+    torch.set_num_threads(1)
+
+
+def _finish_preload(tool):
+    # Everything alive now is frozen, so the workers' collectors never
+    # touch (and so never copy) those pages
+    if settings.share_model_memory:
+        tool.share_memory()
+    gc.collect()
+    gc.freeze()
+
+
+def preload():
+    """Import the app in the master and prepare it to be shared."""
+    _begin_preload()
+    from app.main import app
+    from app.tools.registry import registry
+
+    # Built (and warmed up) here, the workers' lifespan finds them ready
+    registry.start()
+    _finish_preload(registry.inference)
+    return app
+
+
+def preload_tool():
+    """Load an InferenceTool in the master and prepare it to be shared."""
+    _begin_preload()
+    from app.tools.inference_tool import InferenceTool
+    from app.tools.registry import warmup_texts
+
+    tool = InferenceTool()
+    if settings.warmup_enabled:
+        tool.warm_up(warmup_texts())
+    _finish_preload(tool)
+    return tool
+
+
+def worker_torch_threads(workers):
+    return settings.worker_torch_threads or max(
+        1, (os.cpu_count() or 1) // workers
+    )
+
+
+def init_worker(torch_threads):
+    """Undo the master's process-wide setup in a forked worker."""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    gc.enable()
+    torch.set_num_threads(torch_threads)
+
+
+def run_worker(config, sock, torch_threads):
+    init_worker(torch_threads)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Forks ``workers`` processes running ``target`` and supervises them."""
+
+    def __init__(self, target, workers):
+        self.target = target
+        self.workers = workers
+        self.children = set()
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.target()
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children.add(pid)
+        logger.info("Started worker process [%d]", pid)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            pid, status = os.wait()
+            self.children.discard(pid)
+            if self.stopping:
+                continue
+            logger.warning(
+                "Worker process [%d] exited with status %d; restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            # Keep a crashing worker from turning into a fork loop
+            time.sleep(1.0)
+            self.spawn()
+        logger.info("Stopped master process [%d]", os.getpid())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve the API from pre-forked worker processes"
+    )
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    if workers == 1:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            log_level=args.log_level,
+        )
+        return
+    torch_threads = worker_torch_threads(workers)
+
+    # Bind before the (slow) model load so a busy port fails fast
+    sock = bind_socket(args.host, args.port)
+    started = time.perf_counter()
+    app = preload()
+    # Creating the config here configures logging once for all processes
+    config = uvicorn.Config(app, log_level=args.log_level)
+    if workers > 1 and not settings.session_db_path:
+        logger.warning(
+            "Sessions are kept in memory per worker, so a conversation "
+            "loses its state when a message reaches another worker; set "
+            "SESSION_DB_PATH to share them between the %d workers",
+            workers,
+        )
+    logger.info(
+        "Loaded app in %.1fs; forking %d workers with %d torch threads each",
+        time.perf_counter() - started,
+        workers,
+        torch_threads,
+    )
+    Master(
+        functools.partial(run_worker, config, sock, torch_threads), workers
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,224 @@
+import asyncio
+import logging
 from datetime import datetime
-from typing import Any, Dict
+from typing import Optional
 
-from app.chatbot_workflow import compiled_graph
+from app.chatbot_workflow import compiled_graph, route_intent
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.metrics import REQUESTS_BY_INTENT
 from app.models.schemas import ChatResponse
+from app.services.session_store import SessionStore
+from app.tools.registry import registry
+from langgraph.graph import END
+
+logger = logging.getLogger("uvicorn.error")
 
 
 class ChatbotService:
-    def __init__(self):
+    def __init__(self, session_store=None):
         self.compiled_graph = compiled_graph
+        if session_store is None:
+            session_store = SessionStore(db_path=settings.session_db_path)
+        self.sessions = session_store
 
     def process_message(
-        self, message: str, user_id: str, conversation_state: Dict[str, Any]
+        self,
+        message: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> ChatResponse:
+        # Synchronous entry point for scripts; the API uses aprocess_message
+        # and builds the tools in its lifespan
+        registry.start()
+        return asyncio.run(
+            self.aprocess_message(message, user_id, session_id)
+        )
+
+    async def aprocess_message(
+        self,
+        message: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
     ) -> ChatResponse:
+        return await self._aprocess(message, user_id, session_id)
+
+    async def _aprocess(self, message, user_id, session_id, prediction=None):
+        session = await self._open_session(user_id, session_id)
+
+        # Invoke the compiled graph
+        result = await self.compiled_graph.ainvoke(
+            self._initial_state(message, session, prediction)
+        )
+
+        session = await self._close_session(session, result)
+        return self._chat_response(result, session)
+
+    async def aprocess_batch(self, requests):
+        """Process many ChatRequests; yields (index, outcome) pairs.
+
+        Intents for all messages are predicted up front in batched model
+        passes. The rest of the workflow runs for up to
+        chat_batch_concurrency messages at a time, but one message at a
+        time per user: messages with the same user_id (or session_id, if
+        they have no user_id) run in request order, and one without a
+        session_id continues the session of that user's previous message.
+
+        The outcome is the ChatResponse or the exception the message
+        failed with; pairs are yielded as messages finish.
+        """
+        requests = list(requests)
+        predictions = await self._predict_batch(
+            [request.message for request in requests]
+        )
+        semaphore = asyncio.Semaphore(max(1, settings.chat_batch_concurrency))
+        outcomes = asyncio.Queue()
+
+        async def run_user(indices):
+            session_id = None
+            for i in indices:
+                request = requests[i]
+                try:
+                    async with semaphore:
+                        outcome = await self._aprocess(
+                            request.message,
+                            request.user_id,
+                            request.session_id or session_id,
+                            predictions[i],
+                        )
+                    session_id = outcome.session_id
+                except Exception as e:
+                    outcome = e
+                outcomes.put_nowait((i, outcome))
+
+        tasks = [
+            asyncio.create_task(run_user(indices))
+            for indices in self._user_batches(requests)
+        ]
+        try:
+            for _ in requests:
+                yield await outcomes.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _predict_batch(messages):
+        try:
+            return await registry.inference.apredict_intent_batch(messages)
+        except Exception:
+            # Each message is then predicted on its own by the workflow
+            logger.exception("Batch intent prediction failed")
+            return [None] * len(messages)
+
+    @staticmethod
+    def _user_batches(requests):
+        # Request indices grouped by user, in request order; messages with
+        # neither a user_id nor a session_id are independent
+        batches = {}
+        for i, request in enumerate(requests):
+            if request.user_id:
+                key = ("user", request.user_id)
+            elif request.session_id:
+                key = ("session", request.session_id)
+            else:
+                key = ("message", i)
+            batches.setdefault(key, []).append(i)
+        return list(batches.values())
+
+    async def astream_message(
+        self,
+        message: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ):
+        """Yield event dicts while the workflow runs.
+
+        Events, in order: ``intent`` once intent analysis is done,
+        ``response`` for each response text (``final`` marks the last
+        one), ``booking`` when an appointment was created, rescheduled or
+        cancelled, and ``done`` with the same fields as ChatResponse.
+        """
+        session = await self._open_session(user_id, session_id)
+        state = self._initial_state(message, session)
+        result = dict(state)
+
+        async for update in self.compiled_graph.astream(
+            state, stream_mode="updates"
+        ):
+            for node, changes in update.items():
+                changes = changes or {}
+                result.update(changes)
+                if node == "intent_analysis":
+                    yield {
+                        "event": "intent",
+                        "intent": result["intent"],
+                        "confidence": result["confidence"],
+                        "session_id": session.session_id,
+                    }
+                    yield {
+                        "event": "response",
+                        "text": result["response"],
+                        "final": route_intent(result) == END,
+                    }
+                elif "response" in changes:
+                    yield {
+                        "event": "response",
+                        "text": changes["response"],
+                        "final": True,
+                    }
+                if changes.get("appointment_id") is not None:
+                    yield {
+                        "event": "booking",
+                        "action": result["appointment_action"],
+                        "appointment_id": result["appointment_id"],
+                        "datetime": result["datetime"],
+                    }
+
+        session = await self._close_session(session, result)
+        yield {
+            "event": "done",
+            **self._chat_response(result, session).model_dump(mode="json"),
+        }
+
+    async def _open_session(self, user_id, session_id):
+        # Unknown or expired sessions start over with a fresh id
+        session = None
+        if session_id:
+            session = await run_io(self.sessions.load, session_id)
+        if session is None:
+            session = self.sessions.new(user_id)
+            if not user_id:
+                session = session._replace(user_id=session.session_id)
+        return session
+
+    @staticmethod
+    def _initial_state(message, session, prediction=None):
         # Prepare state for the LangGraph workflow
-        state = {
+        return {
             "query": message,
-            "conversation_state": {**conversation_state, "user_id": user_id},
+            "conversation_state": {
+                **session.state,
+                "user_id": session.user_id,
+            },
+            "prediction": prediction,
         }
 
-        # Invoke the compiled graph
-        result = self.compiled_graph.invoke(state)
+    async def _close_session(self, session, result):
+        REQUESTS_BY_INTENT.labels(result["intent"]).inc()
+        conversation_state = dict(result.get("conversation_state", {}))
+        conversation_state.pop("user_id", None)
+        return await run_io(
+            self.sessions.save, session._replace(state=conversation_state)
+        )
 
+    @staticmethod
+    def _chat_response(result, session):
         # Return the response in the expected format
         return ChatResponse(
             response=result["response"],
             intent=result["intent"],
             confidence=result["confidence"],
-            conversation_state=result.get("conversation_state", {}),
+            session_id=session.session_id,
             timestamp=datetime.now(),
-        )
\ No newline at end of file
+        )
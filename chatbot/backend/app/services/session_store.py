@@ -0,0 +1,158 @@
+import json
+import os
+import secrets
+import threading
+import time
+from typing import NamedTuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.db import SQLitePool
+
+CREATE_SESSIONS_SQL = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+CREATE_SESSIONS_EXPIRY_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at "
+    "ON sessions (expires_at)"
+)
+SELECT_SESSION_SQL = (
+    "SELECT user_id, state, version FROM sessions "
+    "WHERE session_id = ? AND expires_at > ?"
+)
+INSERT_SESSION_SQL = (
+    "INSERT INTO sessions (session_id, user_id, state, version, expires_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_SESSION_SQL = (
+    "UPDATE sessions SET state = ?, version = ?, expires_at = ? "
+    "WHERE session_id = ? AND version = ?"
+)
+DELETE_EXPIRED_SESSIONS_SQL = "DELETE FROM sessions WHERE expires_at <= ?"
+
+# Expired rows are purged from sqlite once every this many saves
+PURGE_EVERY = 1000
+
+
+class Session(NamedTuple):
+    session_id: str
+    user_id: str
+    state: dict
+    # Number of saves so far; 0 for a session that was never saved
+    version: int = 0
+
+
+class SessionConflictError(Exception):
+    """The session was saved by another request since it was loaded."""
+
+
+class SessionStore:
+    """Server-side conversation state, keyed by an opaque session id.
+
+    Sessions live in an in-process LRU cache with a sliding TTL. When
+    ``db_path`` is set every save is also written through to sqlite, and
+    loads check sqlite first, so that several worker processes share
+    sessions. Saves are compare-and-set on the session version: a save
+    based on a stale load raises SessionConflictError instead of
+    overwriting newer state.
+    """
+
+    def __init__(self, maxsize=None, ttl_s=None, db_path=None):
+        self.ttl_s = ttl_s if ttl_s is not None else settings.session_ttl_s
+        self.cache = LRUCache(
+            maxsize=(
+                maxsize if maxsize is not None else settings.session_cache_size
+            ),
+            ttl=self.ttl_s,
+        )
+        self._lock = threading.Lock()
+        self._saves = 0
+
+        self.pool = None
+        if db_path:
+            os.makedirs(
+                os.path.dirname(os.path.abspath(db_path)), exist_ok=True
+            )
+            self.pool = SQLitePool(db_path)
+            with self.pool.connection() as conn:
+                conn.execute(CREATE_SESSIONS_SQL)
+                conn.execute(CREATE_SESSIONS_EXPIRY_INDEX_SQL)
+
+    @staticmethod
+    def new(user_id):
+        return Session(secrets.token_urlsafe(16), user_id, {})
+
+    def load(self, session_id):
+        """The stored session, or None if it is unknown or expired."""
+        cached = self.cache.get(session_id)
+        if self.pool is None:
+            return cached
+
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                SELECT_SESSION_SQL, (session_id, time.time())
+            ).fetchone()
+        if row is None:
+            self.cache.pop(session_id)
+            return None
+        user_id, state, version = row
+        if cached is not None and cached.version == version:
+            return cached
+        session = Session(session_id, user_id, json.loads(state), version)
+        self.cache.set(session_id, session)
+        return session
+
+    def save(self, session):
+        """Store ``session`` and return it with its new version."""
+        saved = session._replace(version=session.version + 1)
+        if self.pool is not None:
+            # The conditional UPDATE is the compare-and-set
+            self._write(session, saved)
+            self.cache.set(session.session_id, saved)
+            return saved
+
+        with self._lock:
+            cached = self.cache.get(session.session_id)
+            if cached is not None and cached.version != session.version:
+                raise SessionConflictError(session.session_id)
+            self.cache.set(session.session_id, saved)
+        return saved
+
+    def _write(self, session, saved):
+        expires_at = time.time() + self.ttl_s
+        state = json.dumps(saved.state, separators=(",", ":"))
+        with self.pool.connection() as conn:
+            if session.version == 0:
+                conn.execute(
+                    INSERT_SESSION_SQL,
+                    (
+                        saved.session_id,
+                        saved.user_id,
+                        state,
+                        saved.version,
+                        expires_at,
+                    ),
+                )
+            else:
+                cursor = conn.execute(
+                    UPDATE_SESSION_SQL,
+                    (
+                        state,
+                        saved.version,
+                        expires_at,
+                        saved.session_id,
+                        session.version,
+                    ),
+                )
+                if cursor.rowcount == 0:
+                    raise SessionConflictError(session.session_id)
+
+            self._saves += 1
+            if self._saves % PURGE_EVERY == 0:
+                conn.execute(DELETE_EXPIRED_SESSIONS_SQL, (time.time(),))
@@ -0,0 +1,55 @@
+import shutil
+import time
+
+import pytest
+from app.core.config import settings
+from app.main import app
+from benchmarks.common import SERVICES_CSV, TRAINING_DATA
+from benchmarks.stand_in_model import build_stand_in_model
+from fastapi.testclient import TestClient
+
+READY_TIMEOUT_S = 120
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # A tiny random model and a temporary database, so that the test
+    # needs neither the trained weights nor network access
+    tmp = tmp_path_factory.mktemp("metrics")
+    csv_path = tmp / "services.csv"
+    shutil.copyfile(SERVICES_CSV, csv_path)
+    model_path = build_stand_in_model(str(tmp / "model"))
+
+    # The settings are a module global; restored once the module is done
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "services_csv_path", str(csv_path))
+        patch.setattr(settings, "intent_cascade_data_path", TRAINING_DATA)
+        patch.setattr(
+            settings, "appointments_db_path", str(tmp / "appointments.db")
+        )
+        patch.setattr(settings, "inference_mode", "local")
+        patch.setattr(settings, "model_path", model_path)
+
+        with TestClient(app) as client:
+            deadline = time.monotonic() + READY_TIMEOUT_S
+            while client.get("/ready").status_code != 200:
+                assert time.monotonic() < deadline, "tools never became ready"
+                time.sleep(0.1)
+            yield client
+
+
+def test_chat_is_reported_in_metrics(client):
+    response = client.post(
+        "/api/v1/chat",
+        json={"message": "how much is a thai massage", "user_id": "metrics"},
+    )
+    assert response.status_code == 200
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    body = metrics.text
+    assert 'chatbot_node_duration_seconds_count{node="' in body
+    assert 'chatbot_tool_duration_seconds_count{tool="inference",' in body
+    assert 'chatbot_requests_total{intent="' in body
+    assert "\nchatbot_http_requests_in_flight " in body
+    assert 'chatbot_queue_depth{queue="' in body
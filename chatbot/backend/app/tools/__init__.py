@@ -1,5 +1,17 @@
-from .appointment_tool import AppointmentTool
-from .data_tool import DataTool
-from .inference_tool import InferenceTool
+import importlib
 
-__all__ = ["AppointmentTool", "DataTool", "InferenceTool"]
\ No newline at end of file
+# Tool classes are imported on first access, so that importing one tool
+# module does not load torch, transformers and pandas for all of them
+_EXPORTS = {
+    "AppointmentTool": ".appointment_tool",
+    "DataTool": ".data_tool",
+    "InferenceTool": ".inference_tool",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
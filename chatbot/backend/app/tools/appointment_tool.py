@@ -1,88 +1,172 @@
 import os
-import sqlite3
+
+from app.core.config import settings
+from app.core.db import SQLitePool
+from app.core.metrics import instrument_tool
+
+CREATE_APPOINTMENTS_SQL = """
+    CREATE TABLE IF NOT EXISTS appointments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        service TEXT,
+        date_time TEXT,
+        status TEXT DEFAULT 'pending'
+    )
+"""
+INSERT_APPOINTMENT_SQL = """
+    INSERT INTO appointments (user_id, service, date_time)
+    VALUES (?, ?, ?)
+"""
+CANCEL_APPOINTMENT_SQL = """
+    UPDATE appointments SET status = 'cancelled' WHERE id = ?
+"""
+RESCHEDULE_APPOINTMENT_SQL = """
+    UPDATE appointments SET date_time = ? WHERE id = ?
+"""
+SELECT_USER_APPOINTMENTS_SQL = "SELECT * FROM appointments WHERE user_id = ?"
+SELECT_ALL_APPOINTMENTS_SQL = "SELECT * FROM appointments"
+SELECT_LATEST_PENDING_SQL = """
+    SELECT * FROM appointments
+    WHERE user_id = ? AND status = 'pending'
+    ORDER BY id DESC LIMIT 1
+"""
+SELECT_LATEST_SQL = """
+    SELECT * FROM appointments WHERE user_id = ? ORDER BY id DESC LIMIT 1
+"""
+COUNT_USER_APPOINTMENTS_SQL = (
+    "SELECT count FROM user_appointment_counts WHERE user_id = ?"
+)
+
+# Schema migrations, applied in order and tracked in PRAGMA user_version.
+# Append new steps; never edit a step that has shipped.
+MIGRATIONS = [
+    [CREATE_APPOINTMENTS_SQL],
+    [
+        """
+        CREATE INDEX IF NOT EXISTS idx_appointments_user_status_id
+        ON appointments (user_id, status, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_appointments_user_id
+        ON appointments (user_id, id)
+        """,
+    ],
+    # Per-user booking counts kept by triggers, so that a summary costs a
+    # key lookup instead of a COUNT(*) over the user's whole history
+    [
+        """
+        CREATE TABLE IF NOT EXISTS user_appointment_counts (
+            user_id TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        """,
+        """
+        INSERT OR REPLACE INTO user_appointment_counts (user_id, count)
+        SELECT user_id, COUNT(*) FROM appointments
+        WHERE user_id IS NOT NULL GROUP BY user_id
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS appointments_count_insert
+        AFTER INSERT ON appointments WHEN NEW.user_id IS NOT NULL
+        BEGIN
+            INSERT INTO user_appointment_counts (user_id, count)
+            VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS appointments_count_delete
+        AFTER DELETE ON appointments WHEN OLD.user_id IS NOT NULL
+        BEGIN
+            UPDATE user_appointment_counts SET count = count - 1
+            WHERE user_id = OLD.user_id;
+        END
+        """,
+    ],
+]
 
 
 class AppointmentTool:
-    def __init__(self, db_path="appointments.db"):
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = settings.appointments_db_path
         self.db_path = db_path
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.pool = SQLitePool(db_path)
         self.init_db()
 
     def init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS appointments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                service TEXT,
-                date_time TEXT,
-                status TEXT DEFAULT 'pending'
-            )
-        """
-        )
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, statements in enumerate(
+                MIGRATIONS[version:], start=version + 1
+            ):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {target}")
 
     def add_appointment(self, user_id, service, date_time):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO appointments (user_id, service, date_time)
-            VALUES (?, ?, ?)
-        """,
-            (user_id, service, date_time),
-        )
-        conn.commit()
-        conn.close()
+        self.create_appointment(user_id, service, date_time)
         return "Appointment added successfully."
 
+    @instrument_tool("appointments")
+    def create_appointment(self, user_id, service, date_time):
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                INSERT_APPOINTMENT_SQL, (user_id, service, date_time)
+            )
+        return cursor.lastrowid
+
+    @instrument_tool("appointments")
     def cancel_appointment(self, appointment_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE appointments SET status = 'cancelled' WHERE id = ?
-        """,
-            (appointment_id,),
-        )
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(CANCEL_APPOINTMENT_SQL, (appointment_id,))
         return (
             "Appointment cancelled successfully."
             if cursor.rowcount > 0
             else "Appointment not found."
         )
 
+    @instrument_tool("appointments")
     def reschedule_appointment(self, appointment_id, new_date_time):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE appointments SET date_time = ? WHERE id = ?
-        """,
-            (new_date_time, appointment_id),
-        )
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                RESCHEDULE_APPOINTMENT_SQL, (new_date_time, appointment_id)
+            )
         return (
             "Appointment rescheduled successfully."
             if cursor.rowcount > 0
             else "Appointment not found."
         )
 
+    @instrument_tool("appointments")
     def get_appointments(self, user_id=None):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        if user_id:
-            cursor.execute(
-                "SELECT * FROM appointments WHERE user_id = ?", (user_id,)
-            )
-        else:
-            cursor.execute("SELECT * FROM appointments")
-        results = cursor.fetchall()
-        conn.close()
-        return results
\ No newline at end of file
+        with self.pool.connection() as conn:
+            if user_id:
+                cursor = conn.execute(SELECT_USER_APPOINTMENTS_SQL, (user_id,))
+            else:
+                cursor = conn.execute(SELECT_ALL_APPOINTMENTS_SQL)
+            return cursor.fetchall()
+
+    @instrument_tool("appointments")
+    def get_latest_pending_appointment(self, user_id):
+        with self.pool.connection() as conn:
+            return conn.execute(
+                SELECT_LATEST_PENDING_SQL, (user_id,)
+            ).fetchone()
+
+    @instrument_tool("appointments")
+    def get_appointment_summary(self, user_id):
+        """Return the user's booking count and latest booking (or None).
+
+        Both come from one read transaction, so they agree with each other
+        even while bookings are being added.
+        """
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            row = conn.execute(
+                COUNT_USER_APPOINTMENTS_SQL, (user_id,)
+            ).fetchone()
+            latest = conn.execute(SELECT_LATEST_SQL, (user_id,)).fetchone()
+        return (row[0] if row else 0), latest
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from app.core.config import settings
+from app.tools.entity_matcher import EntityMatcher
+from app.tools.service_catalog import SERVICE_DESCRIPTIONS, ServiceCatalog
+
+
+def default_services_path():
+    if settings.services_csv_path:
+        return settings.services_csv_path
+    return os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "..",
+        "dataset",
+        "simple_dataset.csv",
+    )
+
+
+class CatalogSnapshot(NamedTuple):
+    catalog: ServiceCatalog
+    matcher: EntityMatcher
+    # /services response body and its strong ETag
+    body: bytes
+    etag: str
+    mtime_ns: int
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches ``etag``.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so a
+    W/ prefix added by an intermediary still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class CatalogService:
+    """The service catalog, loaded once from the dataset.
+
+    Everything derived from the dataset (lookup structures, entity
+    matcher, the encoded /services body and its ETag) is built together
+    into one immutable snapshot. When the file's mtime changes a new
+    snapshot is built and swapped in with a single assignment, so readers
+    always see one consistent version. The file is checked at most every
+    ``check_interval_s`` seconds.
+    """
+
+    def __init__(self, csv_path=None, check_interval_s=None):
+        self.csv_path = csv_path or default_services_path()
+        self.check_interval_s = (
+            settings.catalog_reload_check_s
+            if check_interval_s is None
+            else check_interval_s
+        )
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._load(os.stat(self.csv_path).st_mtime_ns)
+        self._next_check = time.monotonic() + self.check_interval_s
+
+    def _load(self, mtime_ns):
+        catalog = ServiceCatalog.from_csv(self.csv_path)
+        body = json.dumps(
+            [
+                {
+                    "name": record.name,
+                    "price": record.price,
+                    "duration": record.duration,
+                    "description": SERVICE_DESCRIPTIONS.get(record.name, ""),
+                }
+                for record in catalog.records
+            ],
+            separators=(",", ":"),
+        ).encode()
+        return CatalogSnapshot(
+            catalog=catalog,
+            matcher=EntityMatcher.from_catalog(catalog),
+            body=body,
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            mtime_ns=mtime_ns,
+        )
+
+    def reload_due(self):
+        return time.monotonic() >= self._next_check
+
+    def reload_if_changed(self):
+        if not self.reload_due():
+            return False
+        with self._reload_lock:
+            if not self.reload_due():
+                return False
+            self._next_check = time.monotonic() + self.check_interval_s
+            try:
+                mtime_ns = os.stat(self.csv_path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime_ns == self._snapshot.mtime_ns:
+                return False
+            # A half-written or broken file keeps the current snapshot
+            try:
+                self._snapshot = self._load(mtime_ns)
+            except Exception:
+                return False
+        return True
+
+    def snapshot(self):
+        return self._snapshot
@@ -1,72 +1,142 @@
-import pandas as pd
+import os
+import threading
+
+from app.core.config import settings
+from app.core.metrics import instrument_tool
+from app.tools.catalog_service import CatalogService
+from app.tools.entity_matcher import first_service
+from app.tools.semantic_index import SemanticIndex
+from app.tools.service_catalog import SERVICE_DESCRIPTIONS
+
+NOT_FOUND_RESPONSE = "Sorry, I couldn't find information on that massage type. Available types: Swedish, Deep Tissue, Hot Stone, Neck and Shoulder, Aromatherapy, Thai, Sports, Prenatal, Reflexology, Full Body Relaxation."
+
+# Questions that name or describe no service. The semantic threshold is
+# calibrated above the best score any of them reaches, so that only a
+# query closer to some service than these are gets answered from the index
+UNSPECIFIC_QUERIES = (
+    "how much does it cost",
+    "how much is it",
+    "what are your prices",
+    "what do you charge",
+    "price list please",
+    "how much for a session",
+    "what does an hour cost",
+    "is it expensive",
+    "do you have any discounts",
+    "what services do you offer",
+    "i want to book an appointment",
+    "hello",
+)
+
+
+def semantic_text(name):
+    """The text embedded for a service: its name and description."""
+    description = SERVICE_DESCRIPTIONS.get(name)
+    return f"{name}: {description}" if description else name
 
 
 class DataTool:
-    def __init__(self, csv_path=None):
-        if csv_path is None:
-            import os
+    """Answers pricing questions from the service catalog.
+
+    The catalog comes from a CatalogService snapshot, shared with the
+    /services endpoint; when the dataset changes the semantic index is
+    synced to the new snapshot, and its threshold recalibrated, before it
+    is used.
+    """
 
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            csv_path = os.path.join(
-                current_dir, "..", "dataset", "simple_dataset.csv"
+    def __init__(
+        self,
+        csv_path=None,
+        embedder=None,
+        model_version=None,
+        catalog_service=None,
+    ):
+        if catalog_service is None:
+            catalog_service = CatalogService(csv_path)
+        self.catalog_service = catalog_service
+        self._snapshot = catalog_service.snapshot()
+        self._sync_lock = threading.Lock()
+
+        self.semantic_index = None
+        self.semantic_threshold = None
+        if embedder is not None and settings.semantic_search_enabled:
+            self.semantic_index = SemanticIndex(
+                embedder,
+                path=os.path.splitext(catalog_service.csv_path)[0]
+                + ".embeddings.npz",
+                model_version=model_version,
             )
-        self.data = pd.read_csv(csv_path)
-
-    def retrieve_and_generate(self, query):
-        query_lower = query.lower()
-
-        # Direct massage type mapping for better accuracy
-        massage_mappings = {
-            "neck": "Neck and Shoulder Massage",
-            "deep tissue": "Deep Tissue Massage",
-            "thai": "Thai Massage",
-            "hot stone": "Hot Stone Massage",
-            "swedish": "Swedish Massage",
-            "aromatherapy": "Aromatherapy Massage",
-            "sports": "Sports Massage",
-            "prenatal": "Prenatal Massage",
-            "reflexology": "Reflexology",
-            "full body": "Full Body Relaxation",
-        }
-
-        # Find the best match
-        best_match = None
-        for key, massage_type in massage_mappings.items():
-            if key in query_lower:
-                best_match = massage_type
-                break
-
-        if best_match:
-            matching_row = self.data[self.data["Massage_Type"] == best_match]
-            if not matching_row.empty:
-                row = matching_row.iloc[0]
-                response = f"The {row['Massage_Type']} costs ${row['Avg_Spending']} and lasts for {row['Duration_Minutes']} minutes."
-                return response
-
-        # Fallback to keyword matching if direct mapping fails
-        keywords = query_lower.split()
-        relevant_rows = self.data[
-            self.data["Massage_Type"]
-            .str.lower()
-            .str.contains("|".join(keywords), na=False)
-        ]
+            self._sync_index(self._snapshot)
 
-        if relevant_rows.empty:
-            return "Sorry, I couldn't find information on that massage type. Available types: Swedish, Deep Tissue, Hot Stone, Neck and Shoulder, Aromatherapy, Thai, Sports, Prenatal, Reflexology, Full Body Relaxation."
+    @property
+    def catalog(self):
+        return self.catalog_service.snapshot().catalog
 
-        def count_matches(row):
-            massage_type = row["Massage_Type"].lower()
-            return sum(1 for keyword in keywords if keyword in massage_type)
+    @property
+    def matcher(self):
+        return self.catalog_service.snapshot().matcher
 
-        relevant_rows = relevant_rows.copy()
-        relevant_rows["match_count"] = relevant_rows.apply(
-            count_matches, axis=1
-        )
-        relevant_rows = relevant_rows.sort_values(
-            by="match_count", ascending=False
+    def _current_snapshot(self):
+        self.catalog_service.reload_if_changed()
+        snapshot = self.catalog_service.snapshot()
+        if snapshot is not self._snapshot:
+            with self._sync_lock:
+                if snapshot is not self._snapshot:
+                    if self.semantic_index is not None:
+                        self._sync_index(snapshot)
+                    self._snapshot = snapshot
+        return snapshot
+
+    def _sync_index(self, snapshot):
+        # Rows are keyed by service name, so a hit is looked up by name
+        names = [record.name for record in snapshot.catalog.records]
+        self.semantic_index.sync(
+            [semantic_text(name) for name in names], keys=names
         )
+        self.semantic_threshold = self.calibrate_threshold()
+
+    def calibrate_threshold(self):
+        """Minimum score of a semantic match, above every unspecific query.
+
+        Scores depend on the encoder, so unless semantic_min_score fixes
+        it, the threshold is measured with the encoder in use
+        (benchmarks.eval_semantic_threshold prints the distribution).
+        """
+        if settings.semantic_min_score is not None:
+            return settings.semantic_min_score
+        scores = [
+            hits[0].score
+            for hits in map(self.semantic_index.search, UNSPECIFIC_QUERIES)
+            if hits
+        ]
+        return max(scores, default=1.0)
+
+    def _semantic_match(self, catalog, query):
+        hits = self.semantic_index.search(query, k=settings.semantic_top_k)
+        if hits and hits[0].score > self.semantic_threshold:
+            return catalog.get(hits[0].key)
+        return None
+
+    @instrument_tool("data")
+    def retrieve_and_generate(self, query, entities=None):
+        # Callers that already scanned the query pass its entities in
+        if entities is None:
+            entities = self.matcher.scan(query)
 
-        top_row = relevant_rows.iloc[0]
-        response = f"The {top_row['Massage_Type']} costs ${top_row['Avg_Spending']} and lasts for {top_row['Duration_Minutes']} minutes."
+        # Named service first, then a query covering a service's name
+        # words, and embedding similarity for everything else: the lexical
+        # match ignores stopwords and generic words, so a paraphrase like
+        # "the one with warm rocks" reaches the embeddings
+        catalog = self._current_snapshot().catalog
+        record = None
+        service = first_service(entities)
+        if service is not None:
+            record = catalog.get(service)
+        if record is None:
+            record = catalog.search(query)
+        if record is None and self.semantic_index is not None:
+            record = self._semantic_match(catalog, query)
 
-        return response
\ No newline at end of file
+        if record is None:
+            return NOT_FOUND_RESPONSE
+        return record.describe()
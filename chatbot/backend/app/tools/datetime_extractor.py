@@ -0,0 +1,280 @@
+import re
+from datetime import datetime, timedelta
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from dateutil import parser
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+WEEKDAYS = {
+    "monday": 0,
+    "tuesday": 1,
+    "tues": 1,
+    "wednesday": 2,
+    "weds": 2,
+    "thursday": 3,
+    "thurs": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+MONTHS = {
+    "january": 1,
+    "jan": 1,
+    "february": 2,
+    "feb": 2,
+    "march": 3,
+    "mar": 3,
+    "april": 4,
+    "apr": 4,
+    "may": 5,
+    "june": 6,
+    "jun": 6,
+    "july": 7,
+    "jul": 7,
+    "august": 8,
+    "aug": 8,
+    "september": 9,
+    "sept": 9,
+    "sep": 9,
+    "october": 10,
+    "oct": 10,
+    "november": 11,
+    "nov": 11,
+    "december": 12,
+    "dec": 12,
+}
+
+_MONTHS = "|".join(sorted(MONTHS, key=len, reverse=True))
+_WEEKDAYS = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+# "may" alone is usually the verb; next to a day number the digit
+# already makes the phrase worth a fallback parse
+_HINT_MONTHS = "|".join(sorted(set(MONTHS) - {"may"}, key=len, reverse=True))
+
+_ISO_RE = re.compile(
+    r"\b(\d{4})-(\d{1,2})-(\d{1,2})(?:[t ](\d{1,2}):(\d{2}))?\b"
+)
+_NUMERIC_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?\b")
+_MONTH_DAY_RE = re.compile(
+    rf"\b({_MONTHS})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?"
+)
+_DAY_MONTH_RE = re.compile(
+    rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTHS})\b\.?"
+    r"(?:,?\s+(\d{4}))?"
+)
+_DAY_OF_MONTH_RE = re.compile(r"\bthe\s+(\d{1,2})(?:st|nd|rd|th)\b")
+_RELATIVE_RE = re.compile(
+    r"\b(?:(day after tomorrow)|(today|tonight)|(tomorrow|tmrw|tmr)"
+    r"|in\s+(\d{1,2})\s+days?|(next week))\b"
+)
+_NEXT_WEEK_DAY_RE = re.compile(
+    rf"\bnext\s+week\s+(?:on\s+)?({_WEEKDAYS})\b"
+    rf"|\b({_WEEKDAYS})\s+(?:of\s+)?next\s+week\b"
+)
+_WEEKDAY_RE = re.compile(rf"\b(?:(next|this|on)\s+)?({_WEEKDAYS})\b")
+_TIME_RE = re.compile(
+    r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\b\.?"
+    r"|\b(\d{1,2}):(\d{2})\b"
+    r"|\b(noon|midday|midnight)\b"
+)
+_AT_HOUR_RE = re.compile(r"\bat\s+(\d{1,2})\b(?!\s*[:/.\d])")
+_FALLBACK_HINT_RE = re.compile(rf"\d|\b(?:{_HINT_MONTHS})\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _iso(match, reference):
+    year, month, day = (int(g) for g in match.group(1, 2, 3))
+    time = None
+    if match.group(4):
+        time = (int(match.group(4)), int(match.group(5)))
+    return datetime(year, month, day).date(), time
+
+
+def _numeric(match, reference):
+    month, day = int(match.group(1)), int(match.group(2))
+    year = match.group(3)
+    if year is None:
+        year = reference.year
+    elif len(year) == 2:
+        year = 2000 + int(year)
+    return datetime(int(year), month, day).date(), None
+
+
+def _month_day(match, reference):
+    month = MONTHS[match.group(1)]
+    year = int(match.group(3)) if match.group(3) else reference.year
+    return datetime(year, month, int(match.group(2))).date(), None
+
+
+def _day_month(match, reference):
+    month = MONTHS[match.group(2)]
+    year = int(match.group(3)) if match.group(3) else reference.year
+    return datetime(year, month, int(match.group(1))).date(), None
+
+
+def _day_of_month(match, reference):
+    # "the 20th" is the next 20th, today included
+    day = int(match.group(1))
+    year, month = reference.year, reference.month
+    if day < reference.day:
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return datetime(year, month, day).date(), None
+
+
+def _relative(match, reference):
+    today = reference.date()
+    if match.group(1):
+        return today + timedelta(days=2), None
+    if match.group(2):
+        return today, None
+    if match.group(3):
+        return today + timedelta(days=1), None
+    if match.group(4):
+        return today + timedelta(days=int(match.group(4))), None
+    return today + timedelta(days=7), None
+
+
+def _next_week_day(match, reference):
+    # That weekday in the following Monday-to-Sunday week
+    monday = reference.date() + timedelta(days=7 - reference.weekday())
+    name = match.group(1) or match.group(2)
+    return monday + timedelta(days=WEEKDAYS[name]), None
+
+
+def _weekday(match, reference):
+    # "friday" / "this friday" is the coming Friday, today included;
+    # "next friday" is always in the future, at most a week away.
+    days_ahead = (WEEKDAYS[match.group(2)] - reference.weekday()) % 7
+    if match.group(1) == "next" and days_ahead == 0:
+        days_ahead = 7
+    return reference.date() + timedelta(days=days_ahead), None
+
+
+# Tried in order; the first pattern that yields a valid date wins
+_DATE_PATTERNS = [
+    (_ISO_RE, _iso),
+    (_NUMERIC_RE, _numeric),
+    (_MONTH_DAY_RE, _month_day),
+    (_DAY_MONTH_RE, _day_month),
+    (_DAY_OF_MONTH_RE, _day_of_month),
+    (_NEXT_WEEK_DAY_RE, _next_week_day),
+    (_RELATIVE_RE, _relative),
+    (_WEEKDAY_RE, _weekday),
+]
+
+
+def _find_date(text, reference):
+    for pattern, convert in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            try:
+                date, time = convert(match, reference)
+            except ValueError:
+                continue
+            return date, time, match.span()
+    return None, None, None
+
+
+def _clock_time(match):
+    if match.group(3):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if not 1 <= hour <= 12:
+            return None
+        return hour % 12 + (12 if match.group(3) == "p" else 0), minute
+    if match.group(4):
+        hour, minute = int(match.group(4)), int(match.group(5))
+        if hour > 23 or minute > 59:
+            return None
+        return hour, minute
+    return (0, 0) if match.group(6) == "midnight" else (12, 0)
+
+
+def _find_time(text):
+    """(hour, minute) and the span they were found at, or (None, None)."""
+    match = _TIME_RE.search(text)
+    if match:
+        return _clock_time(match), match.span()
+
+    match = _AT_HOUR_RE.search(text)
+    if match:
+        hour = int(match.group(1))
+        if 1 <= hour <= 7:
+            # "at 3" during opening hours means the afternoon
+            return (hour + 12, 0), match.span()
+        if hour <= 23:
+            return (hour, 0), match.span()
+    return None, None
+
+
+def _cut(text, span):
+    return text[: span[0]] + " " + text[span[1] :]
+
+
+def normalize_phrase(text):
+    return _WHITESPACE_RE.sub(" ", text.lower()).strip()
+
+
+class DateTimeExtractor:
+    """Pulls a booking date/time out of a chat message.
+
+    Precompiled patterns cover ISO and numeric dates, month names, days
+    of the month ("the 20th"), relative days (today, tomorrow, weekday
+    names, "next week", "next week friday") and clock times, all resolved
+    against a reference time. dateutil's fuzzy parser is only consulted
+    when no date pattern matches and the text contains a digit or month
+    name, and a past date from it is discarded; a time found by the
+    patterns is kept. Results are cached per normalized phrase and
+    reference date.
+    """
+
+    def __init__(self, cache_size=None, use_fallback=None):
+        if cache_size is None:
+            cache_size = settings.datetime_cache_size
+        if use_fallback is None:
+            use_fallback = settings.datetime_dateutil_fallback
+        self.cache = LRUCache(maxsize=cache_size)
+        self.use_fallback = use_fallback
+
+    def extract(self, text, reference=None):
+        reference = reference or datetime.now()
+        phrase = normalize_phrase(text)
+        key = (phrase, reference.date())
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached or None
+
+        result = self._extract(phrase, reference)
+        # Misses are cached as "" so that they are not recomputed either
+        self.cache.set(key, result or "")
+        return result
+
+    def _extract(self, phrase, reference):
+        date, time, span = _find_date(phrase, reference)
+        if time is None:
+            time_text = phrase if span is None else _cut(phrase, span)
+            time, time_span = _find_time(time_text)
+
+        if date is None:
+            if time is None:
+                parsed = self._fallback(phrase, reference)
+                return parsed and parsed.strftime(DATETIME_FORMAT)
+            # The time's own digits would read as a day to dateutil. Today
+            # unless it finds a date
+            parsed = self._fallback(_cut(phrase, time_span), reference)
+            date = reference.date() if parsed is None else parsed.date()
+
+        hour, minute = (0, 0) if time is None else time
+        return datetime(
+            date.year, date.month, date.day, hour, minute
+        ).strftime(DATETIME_FORMAT)
+
+    def _fallback(self, phrase, reference):
+        # Past dates are rejected: fuzzy parsing reads "90 min" as 1990
+        if not self.use_fallback or not _FALLBACK_HINT_RE.search(phrase):
+            return None
+        default = reference.replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            parsed = parser.parse(phrase, fuzzy=True, default=default)
+        except (ValueError, OverflowError):
+            return None
+        return parsed if parsed.date() >= reference.date() else None
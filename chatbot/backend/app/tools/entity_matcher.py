@@ -0,0 +1,70 @@
+import re
+from typing import NamedTuple
+
+BOOKING = "booking"
+SERVICE = "service"
+GENERIC_SERVICE = "generic_service"
+
+BOOKING_VERBS = ("book", "schedule", "appointment", "reserve")
+GENERIC_SERVICE_TERMS = ("massage",)
+
+
+class EntityMatch(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+class EntityMatcher:
+    """Finds services and booking verbs in a query with one regex scan.
+
+    All terms are compiled into a single alternation, longest first, so at
+    any position the most specific term wins ("shoulder massage" over
+    "shoulder"). Terms must start on a word boundary but may be followed
+    by more letters, so "book" also matches "booking".
+    """
+
+    def __init__(self, terms):
+        self.terms = dict(terms)
+        alternation = "|".join(
+            re.escape(term).replace(r"\ ", r"\s+")
+            for term in sorted(self.terms, key=len, reverse=True)
+        )
+        self.pattern = re.compile(rf"\b(?:{alternation})")
+
+    @classmethod
+    def from_catalog(
+        cls,
+        catalog,
+        booking_verbs=BOOKING_VERBS,
+        generic_terms=GENERIC_SERVICE_TERMS,
+    ):
+        terms = {term: (GENERIC_SERVICE, term) for term in generic_terms}
+        for alias, record in catalog.aliases.items():
+            terms[alias] = (SERVICE, record.name)
+        for name, record in catalog.by_name.items():
+            terms[name] = (SERVICE, record.name)
+        for verb in booking_verbs:
+            terms[verb] = (BOOKING, verb)
+        return cls(terms)
+
+    def scan(self, text):
+        return [
+            EntityMatch(
+                *self.terms[" ".join(match.group(0).split())],
+                match.start(),
+                match.end(),
+            )
+            for match in self.pattern.finditer(text.lower())
+        ]
+
+
+def first_service(entities):
+    return next(
+        (entity.value for entity in entities if entity.kind == SERVICE), None
+    )
+
+
+def has_kind(entities, *kinds):
+    return any(entity.kind in kinds for entity in entities)
@@ -0,0 +1,116 @@
+import json
+import os
+
+import torch
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, inputs):
+        with torch.no_grad():
+            logits = self.model(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+            ).logits
+        return torch.nn.functional.softmax(logits, dim=-1)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, onnx_path, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The onnx inference backend requires onnxruntime "
+                "(pip install onnxruntime)"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def predict_proba(self, inputs):
+        logits = self.session.run(
+            ["logits"],
+            {
+                "input_ids": inputs["input_ids"].numpy(),
+                "attention_mask": inputs["attention_mask"].numpy(),
+            },
+        )[0]
+        return torch.nn.functional.softmax(torch.from_numpy(logits), dim=-1)
+
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(
+            input_ids=input_ids, attention_mask=attention_mask
+        ).logits
+
+
+def export_metadata_path(onnx_path):
+    return onnx_path + ".json"
+
+
+def read_export_metadata(onnx_path):
+    """How export_onnx made ``onnx_path``, or None if it did not."""
+    try:
+        with open(export_metadata_path(onnx_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def export_onnx(
+    model, onnx_path, quantize=True, opset_version=17, metadata=None
+):
+    """Export a sequence classifier to ONNX, optionally int8-quantized.
+
+    The quantize mode and ``metadata`` are written to a JSON file next to
+    the export, see read_export_metadata.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(onnx_path)), exist_ok=True)
+    fp32_path = onnx_path + ".fp32" if quantize else onnx_path
+
+    input_ids = torch.ones((1, 8), dtype=torch.long)
+    attention_mask = torch.ones((1, 8), dtype=torch.long)
+    sequence_axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        _LogitsOnly(model).eval(),
+        (input_ids, attention_mask),
+        fp32_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": sequence_axes,
+            "attention_mask": sequence_axes,
+            "logits": {0: "batch"},
+        },
+        opset_version=opset_version,
+        dynamo=False,
+    )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, onnx_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    with open(export_metadata_path(onnx_path), "w") as f:
+        json.dump({**(metadata or {}), "quantize": quantize}, f)
+    return onnx_path
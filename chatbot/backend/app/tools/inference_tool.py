@@ -1,80 +1,544 @@
+import asyncio
+import logging
+import os
 import pickle
 import re
+import threading
+import time
+from typing import NamedTuple
 
+import numpy as np
 import torch
-from dateutil import parser
+from app.core.batching import MicroBatcher
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.executors import run_cpu
+from app.core.metrics import instrument_tool
+from app.tools.datetime_extractor import DateTimeExtractor
+from app.tools.inference_backends import (OnnxBackend, TorchBackend,
+                                         export_onnx, read_export_metadata)
+from app.tools.intent_cascade import (FAST_TIER, MODEL_TIER, IntentCascade,
+                                      TierStats)
+from app.tools.intent_responses import intent_response
+from app.tools.model_artifact import is_artifact, load_artifact
 from transformers import DistilBertForSequenceClassification
 
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    text = _PUNCTUATION_RE.sub("", text.casefold())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def artifact_fingerprint(path):
+    if os.path.isdir(path):
+        stats = [entry.stat() for entry in os.scandir(path) if entry.is_file()]
+    else:
+        stats = [os.stat(path)]
+    return (
+        max(stat.st_mtime_ns for stat in stats),
+        sum(stat.st_size for stat in stats),
+    )
+
+
+def default_cascade_data_path():
+    """Intent examples for the cascade, or None if there are none.
+
+    app/dataset/ is not tracked, so without a local copy there the file
+    falls back to notebooks/training_data.json in the repository, which
+    is outside the backend's Docker build context.
+    """
+    if settings.intent_cascade_data_path:
+        return settings.intent_cascade_data_path
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in (
+        os.path.join(here, "..", "dataset", "training_data.json"),
+        os.path.join(
+            here, "..", "..", "..", "..", "notebooks", "training_data.json"
+        ),
+    ):
+        if os.path.exists(path):
+            return os.path.normpath(path)
+    return None
+
+
+def default_model_path():
+    if settings.model_path:
+        return settings.model_path
+    model_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "model"
+    )
+    artifact_path = os.path.join(model_dir, "chatbot_model")
+    if is_artifact(artifact_path):
+        return artifact_path
+    return os.path.join(model_dir, "chatbot_model.pkl")
+
+
+class LoadedModel(NamedTuple):
+    """Everything loaded from one model artifact, swapped in as a unit."""
+
+    model: object
+    tokenizer: object
+    label_encoder: dict
+    reverse_label_encoder: dict
+    backend: object
+    version: tuple
+
 
 class InferenceTool:
     def __init__(self, model_path=None):
         if model_path is None:
-            import os
+            model_path = default_model_path()
+        self.model_path = model_path
+        self.intent_cache = LRUCache(
+            maxsize=settings.intent_cache_size,
+            ttl=settings.intent_cache_ttl_s,
+        )
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+        self._failed_version = None
+        self._next_artifact_check = 0.0
+        self.datetime_extractor = DateTimeExtractor()
+        self.load_model()
+
+        self.cascade = None
+        self.tier_stats = TierStats()
+        if settings.intent_cascade_enabled:
+            data_path = default_cascade_data_path()
+            if data_path is None or not os.path.exists(data_path):
+                logger.warning(
+                    "Intent cascade disabled: training data not found (%s); "
+                    "set INTENT_CASCADE_DATA_PATH",
+                    data_path or "app/dataset/training_data.json",
+                )
+            else:
+                self.cascade = IntentCascade.from_json(
+                    data_path,
+                    target_precision=settings.intent_cascade_target_precision,
+                )
 
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            model_path = os.path.join(
-                current_dir, "..", "model", "chatbot_model.pkl"
+        self.batcher = None
+        if settings.inference_batching_enabled:
+            self.batcher = MicroBatcher(
+                self.predict_intents,
+                max_batch_size=settings.inference_batch_max_size,
+                window_ms=settings.inference_batch_window_ms,
+                max_wait_ms=settings.inference_batch_max_wait_ms,
+                name="intent-batcher",
             )
+
+    # Readers that need several of these at once take one self._loaded
+    # snapshot, so that a reload can never mix two models in one call
+    @property
+    def model(self):
+        return self._loaded.model
+
+    @property
+    def tokenizer(self):
+        return self._loaded.tokenizer
+
+    @property
+    def label_encoder(self):
+        return self._loaded.label_encoder
+
+    @property
+    def reverse_label_encoder(self):
+        return self._loaded.reverse_label_encoder
+
+    @property
+    def backend(self):
+        return self._loaded.backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._loaded = self._loaded._replace(backend=backend)
+
+    @property
+    def model_version(self):
+        return self._loaded.version
+
+    def load_model(self):
+        self._loaded = self._load()
+        self.intent_cache.clear()
+
+    def _load(self):
+        fingerprint = artifact_fingerprint(self.model_path)
+        if is_artifact(self.model_path):
+            model, tokenizer, label_encoder, reverse_label_encoder = (
+                load_artifact(self.model_path)
+            )
+        else:
+            model, tokenizer, label_encoder, reverse_label_encoder = (
+                self._load_pickle(self.model_path)
+            )
+        return LoadedModel(
+            model,
+            tokenizer,
+            label_encoder,
+            reverse_label_encoder,
+            self._build_backend(model, fingerprint),
+            fingerprint,
+        )
+
+    @staticmethod
+    def _load_pickle(model_path):
+        # Legacy notebook format; convert it with app.tools.model_artifact
+        # to avoid the hub download and the double weight load below.
         with open(model_path, "rb") as f:
             model_data = pickle.load(f)
-        self.tokenizer = model_data["tokenizer"]
-        self.label_encoder = model_data["label_encoder"]
-        self.reverse_label_encoder = model_data["reverse_label_encoder"]
 
-        num_labels = len(self.label_encoder)
-        self.model = DistilBertForSequenceClassification.from_pretrained(
+        num_labels = len(model_data["label_encoder"])
+        model = DistilBertForSequenceClassification.from_pretrained(
             "distilbert-base-uncased", num_labels=num_labels
         )
-        self.model.load_state_dict(model_data["model_state_dict"])
-        self.model.eval()
+        model.load_state_dict(model_data["model_state_dict"])
+        model.eval()
+        return (
+            model,
+            model_data["tokenizer"],
+            model_data["label_encoder"],
+            model_data["reverse_label_encoder"],
+        )
+
+    def _build_backend(self, model, fingerprint):
+        if settings.inference_backend == "torch":
+            return TorchBackend(model)
+        if settings.inference_backend != "onnx":
+            raise ValueError(
+                f"Unknown inference backend: {settings.inference_backend}"
+            )
+
+        quantize = settings.onnx_quantize
+        onnx_path = settings.onnx_model_path or (
+            os.path.splitext(self.model_path)[0]
+            + (".int8.onnx" if quantize else ".fp32.onnx")
+        )
+        source = list(fingerprint)
+        metadata = read_export_metadata(onnx_path)
+        if not os.path.exists(onnx_path):
+            stale = True
+        elif metadata is not None:
+            # Our own exports record the artifact and mode they came from
+            stale = (
+                metadata.get("source") != source
+                or metadata.get("quantize") != quantize
+            )
+        else:
+            # An export made elsewhere is used unless the artifact is newer
+            stale = os.stat(onnx_path).st_mtime_ns < fingerprint[0]
+        if stale:
+            export_onnx(
+                model,
+                onnx_path,
+                quantize=quantize,
+                metadata={"source": source},
+            )
+        return OnnxBackend(onnx_path, num_threads=settings.onnx_num_threads)
+
+    def reload_if_changed(self):
+        """Start loading the model again if its artifact has changed.
+
+        The load runs in a background thread while the current model keeps
+        serving, and the new one is swapped in only once it has loaded. A
+        load that fails, e.g. on an artifact that is still being written,
+        is logged and retried only once the artifact changes again.
+        Replace artifact files by renaming new ones over them: the loaded
+        weights are memory-mapped, so rewriting a file in place can crash
+        the process.
+        """
+        now = time.monotonic()
+        if now < self._next_artifact_check:
+            return False
+        self._next_artifact_check = now + settings.model_reload_check_s
+
+        try:
+            fingerprint = artifact_fingerprint(self.model_path)
+        except OSError:
+            return False
+        if fingerprint in (self.model_version, self._failed_version):
+            return False
+        with self._reload_lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        threading.Thread(
+            target=self._reload,
+            args=(fingerprint,),
+            name="model-reload",
+            daemon=True,
+        ).start()
+        return True
 
+    def _reload(self, fingerprint):
+        try:
+            loaded = self._load()
+        except Exception:
+            self._failed_version = fingerprint
+            logger.exception(
+                "Reloading %s failed; still serving the previous model",
+                self.model_path,
+            )
+        else:
+            self._loaded = loaded
+            self.intent_cache.clear()
+            logger.info("Reloaded model from %s", self.model_path)
+        finally:
+            with self._reload_lock:
+                self._reloading = False
+
+    @instrument_tool("inference")
     def predict_intent(self, text):
-        inputs = self.tokenizer(
-            text,
+        self.reload_if_changed()
+        # The model version is part of the key so that a prediction racing
+        # with a reload can never be served for the new model.
+        key = (self.model_version, normalize_query(text))
+        cached = self.intent_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._fast_tier([text])[0]
+        if result is None:
+            started = time.perf_counter()
+            if self.batcher is not None:
+                result = self.batcher.submit(text)
+            else:
+                result = self.predict_intents([text])[0]
+            self.tier_stats.record(
+                MODEL_TIER, 1, 1, time.perf_counter() - started
+            )
+        self.intent_cache.set(key, result)
+        return result
+
+    @instrument_tool("inference")
+    async def apredict_intent(self, text):
+        """Event-loop friendly predict_intent.
+
+        The model never runs on the calling loop: batched calls await the
+        batcher's future and unbatched calls go to the CPU executor.
+        """
+        if time.monotonic() >= self._next_artifact_check:
+            await run_cpu(self.reload_if_changed)
+        key = (self.model_version, normalize_query(text))
+        cached = self.intent_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._fast_tier([text])[0]
+        if result is None:
+            started = time.perf_counter()
+            if self.batcher is not None:
+                result = await asyncio.wrap_future(
+                    self.batcher.submit_future(text)
+                )
+            else:
+                result = (await run_cpu(self.predict_intents, [text]))[0]
+            self.tier_stats.record(
+                MODEL_TIER, 1, 1, time.perf_counter() - started
+            )
+        self.intent_cache.set(key, result)
+        return result
+
+    @instrument_tool("inference")
+    async def apredict_intent_batch(self, texts):
+        """apredict_intent for many texts at once.
+
+        Cached texts are answered from the cache and the fast tier runs
+        over the rest in one call. Whatever is left is deduplicated and
+        goes through the model in chunks of inference_batch_max_size on
+        the CPU executor, rather than one batcher submission per text.
+        """
+        if time.monotonic() >= self._next_artifact_check:
+            await run_cpu(self.reload_if_changed)
+        version = self.model_version
+        keys = [(version, normalize_query(text)) for text in texts]
+        results = [self.intent_cache.get(key) for key in keys]
+
+        misses = [i for i, result in enumerate(results) if result is None]
+        escalated = {}
+        if misses:
+            fast = self._fast_tier([texts[i] for i in misses])
+            for i, result in zip(misses, fast):
+                if result is None:
+                    escalated.setdefault(keys[i], []).append(i)
+                else:
+                    results[i] = result
+                    self.intent_cache.set(keys[i], result)
+
+        pending = list(escalated)
+        chunk_size = max(1, settings.inference_batch_max_size)
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start : start + chunk_size]
+            started = time.perf_counter()
+            predictions = await run_cpu(
+                self.predict_intents,
+                [texts[escalated[key][0]] for key in chunk],
+            )
+            self.tier_stats.record(
+                MODEL_TIER,
+                len(chunk),
+                len(chunk),
+                time.perf_counter() - started,
+            )
+            for key, result in zip(chunk, predictions):
+                self.intent_cache.set(key, result)
+                for i in escalated[key]:
+                    results[i] = result
+        return results
+
+    def _fast_tier(self, texts):
+        """Cascade predictions, None where the text must go to the model.
+
+        The TF-IDF tier costs well under a millisecond, so unlike the
+        transformer it runs inline on the caller's thread.
+        """
+        if self.cascade is None:
+            return [None] * len(texts)
+        started = time.perf_counter()
+        results = [
+            result if result and result[0] in self.label_encoder else None
+            for result in self.cascade.predict(texts)
+        ]
+        self.tier_stats.record(
+            FAST_TIER,
+            len(texts),
+            sum(result is not None for result in results),
+            time.perf_counter() - started,
+        )
+        return results
+
+    @instrument_tool("inference")
+    def predict_intents(self, texts):
+        texts = list(texts)
+        loaded = self._loaded
+        if settings.inference_padding == "max_length":
+            inputs = loaded.tokenizer(
+                texts,
+                truncation=True,
+                padding="max_length",
+                max_length=settings.inference_max_length,
+                return_tensors="pt",
+            )
+            return self._classify(inputs, loaded)
+
+        encoded = loaded.tokenizer(
+            texts,
             truncation=True,
-            padding="max_length",
-            max_length=128,
-            return_tensors="pt",
+            max_length=settings.inference_max_length,
         )
+        results = [None] * len(texts)
+        for indices in self._length_buckets(encoded["input_ids"]):
+            inputs = loaded.tokenizer.pad(
+                {
+                    "input_ids": [encoded["input_ids"][i] for i in indices],
+                    "attention_mask": [
+                        encoded["attention_mask"][i] for i in indices
+                    ],
+                },
+                padding="longest",
+                return_tensors="pt",
+            )
+            for i, result in zip(indices, self._classify(inputs, loaded)):
+                results[i] = result
+        return results
 
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            predicted_label = torch.argmax(predictions, dim=-1).item()
-            confidence = predictions[0][predicted_label].item()
+    @instrument_tool("inference")
+    def embed(self, texts, batch_size=64):
+        """Mean-pooled sentence vectors from the classifier's encoder."""
+        vectors = []
+        texts = list(texts)
+        loaded = self._loaded
+        for start in range(0, len(texts), batch_size):
+            inputs = loaded.tokenizer(
+                texts[start : start + batch_size],
+                truncation=True,
+                max_length=settings.inference_max_length,
+                padding="longest",
+                return_tensors="pt",
+            )
+            with torch.no_grad():
+                hidden = loaded.model.distilbert(
+                    input_ids=inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                ).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            vectors.append(pooled.numpy())
+        return np.concatenate(vectors) if vectors else np.zeros((0, 0))
 
-        intent = self.reverse_label_encoder[predicted_label]
-        return intent, confidence
+    def _length_buckets(self, input_ids):
+        bounds = sorted(settings.inference_length_buckets)
+        buckets = {}
+        for i, ids in enumerate(input_ids):
+            bucket = next((b for b in bounds if len(ids) <= b), len(ids))
+            buckets.setdefault(bucket, []).append(i)
+        return [buckets[bucket] for bucket in sorted(buckets)]
 
-    def extract_datetime(self, text):
-        try:
-            parsed_date = parser.parse(text, fuzzy=True)
-            standardized = parsed_date.strftime("%Y-%m-%d %H:%M")
-            return standardized
-        except ValueError:
-            return None
+    @instrument_tool("inference")
+    def _classify(self, inputs, loaded):
+        predictions = loaded.backend.predict_proba(inputs)
+        confidences, predicted_labels = torch.max(predictions, dim=-1)
 
-    def predict_and_respond(self, text):
-        intent, confidence = self.predict_intent(text)
+        return [
+            (loaded.reverse_label_encoder[label], confidence)
+            for label, confidence in zip(
+                predicted_labels.tolist(), confidences.tolist()
+            )
+        ]
+
+    def warm_up(self, texts):
+        """Run texts through the model, bypassing the cascade and cache.
+
+        The first forward pass of each input shape pays for lazy kernel
+        selection and allocation; texts of several lengths cover every
+        length bucket.
+        """
+        self.predict_intents(texts)
+
+    def share_memory(self):
+        """Prepare the weights to be shared by forked worker processes.
+
+        Tensors are moved to shared memory, so pages stay shared even if a
+        worker writes to them, and gradients are disabled so that no
+        worker ever allocates grad buffers. A model reloaded later by
+        reload_if_changed is private to the process that loaded it.
+        """
+        self.model.eval()
+        self.model.requires_grad_(False)
+        self.model.share_memory()
+
+    def batching_stats(self):
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.stats()}
 
-        responses = {
-            "greeting": "Hello! How can I help with your booking?",
-            "reschedule_booking": "Sure, let's reschedule. Provide the new date and time.",
-            "cancel_booking": "Got it. Confirm if you want to cancel.",
-            "pricing_inquiry": "Let me check the prices.",
-            "book_service": "I'd be happy to book. What type and when?",
-            "booking_status": "Please provide your booking reference.",
-            "thanks": "You're welcome!",
-            "confirm": "Confirmed!",
-            "deny": "No problem.",
-            "provide_datetime": "Noted the time.",
+    def cache_stats(self):
+        return {
+            "model_version": self.model_version,
+            **self.intent_cache.stats(),
         }
 
-        response = responses.get(
-            intent, "I'm sorry, I didn't understand that."
-        )
+    def cascade_stats(self):
+        if self.cascade is None:
+            return {"enabled": False}
         return {
-            "response": response,
-            "intent": intent,
-            "confidence": confidence,
-        }
\ No newline at end of file
+            "enabled": True,
+            "threshold": self.cascade.threshold,
+            "cv_accuracy": self.cascade.cv_accuracy,
+            "tiers": self.tier_stats.stats(),
+        }
+
+    @instrument_tool("inference")
+    def extract_datetime(self, text, reference=None):
+        return self.datetime_extractor.extract(text, reference)
+
+    def predict_and_respond(self, text):
+        intent, confidence = self.predict_intent(text)
+        return intent_response(intent, confidence)
+
+    async def apredict_and_respond(self, text):
+        intent, confidence = await self.apredict_intent(text)
+        return intent_response(intent, confidence)
\ No newline at end of file
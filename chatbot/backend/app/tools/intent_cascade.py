@@ -0,0 +1,197 @@
+import json
+import math
+import threading
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.pipeline import make_pipeline, make_union
+
+FAST_TIER = "fast"
+MODEL_TIER = "model"
+
+
+def load_examples(path):
+    with open(path) as f:
+        data = json.load(f)
+    return [item["text"] for item in data], [item["intent"] for item in data]
+
+
+def build_pipeline(C=10.0):
+    features = make_union(
+        TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True),
+        TfidfVectorizer(
+            analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True
+        ),
+    )
+    return make_pipeline(features, LogisticRegression(C=C, max_iter=3000))
+
+
+def calibrate_threshold(confidences, correct, target_precision, min_accepted):
+    """Lowest confidence whose accepted set meets ``target_precision``.
+
+    Predictions are ranked by confidence and the cut is placed after the
+    longest prefix whose precision is still at least the target. Returns
+    None when no prefix of ``min_accepted`` or more predictions qualifies.
+    """
+    order = np.argsort(-np.asarray(confidences), kind="stable")
+    hits = np.cumsum(np.asarray(correct)[order])
+    precision = hits / np.arange(1, len(order) + 1)
+    qualifying = np.flatnonzero(precision >= target_precision)
+    if not len(qualifying) or qualifying[-1] + 1 < min_accepted:
+        return None
+    return float(np.asarray(confidences)[order[qualifying[-1]]])
+
+
+class IntentCascade:
+    """Cheap first tier for intent classification.
+
+    A TF-IDF (word and character n-grams) logistic regression is trained on
+    the intent examples. Its confidence threshold is calibrated on
+    cross-validated predictions so that accepted predictions reach
+    ``target_precision``; anything below the threshold is left for the
+    transformer.
+    """
+
+    def __init__(
+        self,
+        texts,
+        labels,
+        target_precision=0.95,
+        folds=5,
+        min_accepted=10,
+        random_state=0,
+    ):
+        self.target_precision = target_precision
+        self.pipeline = build_pipeline()
+        cv = StratifiedKFold(folds, shuffle=True, random_state=random_state)
+        probabilities = cross_val_predict(
+            self.pipeline, texts, labels, cv=cv, method="predict_proba"
+        )
+        self.pipeline.fit(texts, labels)
+        self.classes = self.pipeline.classes_
+
+        self._tables = self._compile()
+
+        predicted = self.classes[probabilities.argmax(axis=1)]
+        self.cv_accuracy = float(np.mean(predicted == np.asarray(labels)))
+        self.threshold = calibrate_threshold(
+            probabilities.max(axis=1),
+            predicted == np.asarray(labels),
+            target_precision,
+            min_accepted,
+        )
+
+    @classmethod
+    def from_json(cls, path, **kwargs):
+        return cls(*load_examples(path), **kwargs)
+
+    def _compile(self):
+        """Fold idf and class weights into one vector per vocabulary term.
+
+        sklearn's transform/predict_proba cost milliseconds per call in
+        input validation and sparse-matrix plumbing; scoring a short
+        message from these tables is a few dict lookups and vector adds.
+        """
+        features, classifier = self.pipeline[0], self.pipeline[-1]
+        coef = classifier.coef_
+        if coef.shape[0] == 1:
+            # Binary problems store one row; expand to per-class scores
+            coef = np.vstack([-coef[0] / 2.0, coef[0] / 2.0])
+        tables, offset = [], 0
+        for _, vectorizer in features.transformer_list:
+            columns = coef[:, offset : offset + len(vectorizer.idf_)]
+            tables.append(
+                (
+                    vectorizer.build_analyzer(),
+                    {
+                        term: (float(vectorizer.idf_[col]), columns[:, col])
+                        for term, col in vectorizer.vocabulary_.items()
+                    },
+                )
+            )
+            offset += len(vectorizer.idf_)
+        intercept = classifier.intercept_
+        if len(intercept) == 1:
+            intercept = np.array([-intercept[0] / 2.0, intercept[0] / 2.0])
+        return tables, intercept
+
+    def predict_proba(self, texts):
+        tables, intercept = self._tables
+        scores = np.tile(intercept, (len(texts), 1))
+        for row, text in enumerate(texts):
+            for analyze, weights in tables:
+                counts = {}
+                for term in analyze(text):
+                    if term in weights:
+                        counts[term] = counts.get(term, 0) + 1
+                if not counts:
+                    continue
+                # sublinear tf, idf and l2 normalization, as TfidfVectorizer
+                values = {
+                    term: (1.0 + math.log(count)) * weights[term][0]
+                    for term, count in counts.items()
+                }
+                norm = math.sqrt(sum(v * v for v in values.values()))
+                for term, value in values.items():
+                    scores[row] += (value / norm) * weights[term][1]
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, texts):
+        """(label, confidence) per text, or None where it should escalate."""
+        if self.threshold is None:
+            return [None] * len(texts)
+        probabilities = self.predict_proba(list(texts))
+        best = probabilities.argmax(axis=1)
+        return [
+            (
+                (str(self.classes[i]), float(row[i]))
+                if row[i] >= self.threshold
+                else None
+            )
+            for row, i in zip(probabilities, best)
+        ]
+
+
+class TierStats:
+    """Per-tier counts and latency for the intent cascade.
+
+    ``attempted`` is how many texts a tier scored and ``resolved`` how many
+    of them it answered; the fast tier escalates the rest to the model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._attempted = {FAST_TIER: 0, MODEL_TIER: 0}
+            self._resolved = {FAST_TIER: 0, MODEL_TIER: 0}
+            self._seconds = {FAST_TIER: 0.0, MODEL_TIER: 0.0}
+
+    def record(self, tier, attempted, resolved, seconds):
+        with self._lock:
+            self._attempted[tier] += attempted
+            self._resolved[tier] += resolved
+            self._seconds[tier] += seconds
+
+    def stats(self):
+        with self._lock:
+            total = sum(self._resolved.values())
+            return {
+                tier: {
+                    "attempted": attempted,
+                    "resolved": self._resolved[tier],
+                    "hit_rate": self._resolved[tier] / total if total else 0.0,
+                    "avg_ms": (
+                        self._seconds[tier] * 1000.0 / attempted
+                        if attempted
+                        else 0.0
+                    ),
+                }
+                for tier, attempted in self._attempted.items()
+            }
@@ -0,0 +1,23 @@
+INTENT_RESPONSES = {
+    "greeting": "Hello! How can I help with your booking?",
+    "reschedule_booking": "Sure, let's reschedule. Provide the new date and time.",
+    "cancel_booking": "Got it. Confirm if you want to cancel.",
+    "pricing_inquiry": "Let me check the prices.",
+    "book_service": "I'd be happy to book. What type and when?",
+    "booking_status": "Please provide your booking reference.",
+    "thanks": "You're welcome!",
+    "confirm": "Confirmed!",
+    "deny": "No problem.",
+    "provide_datetime": "Noted the time.",
+}
+
+
+def intent_response(intent, confidence):
+    response = INTENT_RESPONSES.get(
+        intent, "I'm sorry, I didn't understand that."
+    )
+    return {
+        "response": response,
+        "intent": intent,
+        "confidence": confidence,
+    }
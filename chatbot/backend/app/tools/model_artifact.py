@@ -0,0 +1,188 @@
+"""Self-contained intent model artifact.
+
+An artifact is a directory holding everything needed to serve the intent
+classifier without network access:
+
+    config.json         DistilBERT model config
+    labels.json         intent label -> class index
+    model.safetensors   weights (memory-mapped on load)
+    vocab.txt, ...      tokenizer files
+
+Convert a legacy pickle with:
+
+    python -m app.tools.model_artifact model/chatbot_model.pkl model/chatbot_model
+"""
+
+import argparse
+import json
+import mmap
+import os
+import pickle
+import struct
+
+import torch
+from safetensors.torch import save_file
+from transformers import (AutoTokenizer, DistilBertConfig,
+                          DistilBertForSequenceClassification)
+
+CONFIG_FILE = "config.json"
+LABELS_FILE = "labels.json"
+WEIGHTS_FILE = "model.safetensors"
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def is_artifact(path):
+    return os.path.isdir(path) and os.path.exists(
+        os.path.join(path, WEIGHTS_FILE)
+    )
+
+
+def mmap_safetensors(path):
+    """Return tensors that view a private, copy-on-write mapping of ``path``.
+
+    Pages are read lazily from the page cache and shared by every process
+    mapping the same file until one of them writes to a tensor.
+    """
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        if begin == end:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(
+            buffer,
+            dtype=dtype,
+            count=(end - begin) // dtype.itemsize,
+            offset=data_start + begin,
+        ).reshape(info["shape"])
+    return tensors
+
+
+def save_artifact(path, model, tokenizer, label_encoder):
+    os.makedirs(path, exist_ok=True)
+    model.config.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    with open(os.path.join(path, LABELS_FILE), "w") as f:
+        json.dump(label_encoder, f, indent=2, sort_keys=True)
+
+    # Non-persistent buffers are stored as well so that the loader never
+    # has to materialize anything the file does not contain.
+    tensors = dict(model.state_dict())
+    for name, buffer in model.named_buffers():
+        tensors.setdefault(name, buffer)
+    save_file(
+        {name: tensor.contiguous() for name, tensor in tensors.items()},
+        os.path.join(path, WEIGHTS_FILE),
+        metadata={"format": "pt"},
+    )
+
+
+def load_artifact(path):
+    """Load ``(model, tokenizer, label_encoder, reverse_label_encoder)``.
+
+    The model is built on the meta device from its config and its
+    parameters are then bound directly to the memory-mapped weights, so
+    the weights are neither initialized nor copied.
+    """
+    config = DistilBertConfig.from_json_file(os.path.join(path, CONFIG_FILE))
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    with open(os.path.join(path, LABELS_FILE)) as f:
+        label_encoder = json.load(f)
+    reverse_label_encoder = {idx: label for label, idx in label_encoder.items()}
+
+    with torch.device("meta"):
+        model = DistilBertForSequenceClassification(config)
+
+    tensors = mmap_safetensors(os.path.join(path, WEIGHTS_FILE))
+    state_keys = set(model.state_dict())
+    model.load_state_dict(
+        {name: t for name, t in tensors.items() if name in state_keys},
+        assign=True,
+    )
+    for name, tensor in tensors.items():
+        if name not in state_keys:
+            module_name, _, buffer_name = name.rpartition(".")
+            model.get_submodule(module_name)._buffers[buffer_name] = tensor
+    model.eval()
+    return model, tokenizer, label_encoder, reverse_label_encoder
+
+
+def _config_from_state_dict(state_dict, num_labels, n_heads):
+    prefix = "distilbert."
+    word_embeddings = state_dict[prefix + "embeddings.word_embeddings.weight"]
+    layers = {
+        key.split(".")[3]
+        for key in state_dict
+        if key.startswith(prefix + "transformer.layer.")
+    }
+    return DistilBertConfig(
+        vocab_size=word_embeddings.shape[0],
+        dim=word_embeddings.shape[1],
+        max_position_embeddings=state_dict[
+            prefix + "embeddings.position_embeddings.weight"
+        ].shape[0],
+        n_layers=len(layers),
+        n_heads=n_heads,
+        hidden_dim=state_dict[
+            prefix + "transformer.layer.0.ffn.lin1.weight"
+        ].shape[0],
+        num_labels=num_labels,
+    )
+
+
+def convert_pickle(pickle_path, output_path, n_heads=12):
+    """Convert a notebook ``chatbot_model.pkl`` into an artifact directory.
+
+    The model config is inferred from the weight shapes; only the number of
+    attention heads cannot be, and defaults to distilbert-base-uncased's.
+    """
+    with open(pickle_path, "rb") as f:
+        model_data = pickle.load(f)
+
+    label_encoder = model_data["label_encoder"]
+    state_dict = model_data["model_state_dict"]
+    config = _config_from_state_dict(state_dict, len(label_encoder), n_heads)
+    config.id2label = {idx: label for label, idx in label_encoder.items()}
+    config.label2id = dict(label_encoder)
+
+    model = DistilBertForSequenceClassification(config)
+    model.load_state_dict(state_dict)
+    save_artifact(output_path, model, model_data["tokenizer"], label_encoder)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a pickled intent model into an artifact"
+    )
+    parser.add_argument("pickle_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--n-heads", type=int, default=12)
+    args = parser.parse_args()
+    convert_pickle(args.pickle_path, args.output_path, n_heads=args.n_heads)
+    print(f"Artifact written to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
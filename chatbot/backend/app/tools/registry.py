@@ -0,0 +1,189 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+
+# Queries of increasing length, so warm-up runs every length bucket
+WARMUP_TEXTS = (
+    "hi",
+    "how much is a thai massage",
+    "can I book a hot stone massage for tomorrow at 3pm please",
+    "I booked a deep tissue massage last week but something came up at "
+    "work, could you move it to Friday afternoon or Saturday morning if "
+    "either of those is still free, and let me know the price difference",
+)
+
+
+class ToolsNotReadyError(RuntimeError):
+    """A tool was used before the registry finished starting."""
+
+
+def warmup_texts(batch_size=None):
+    batch_size = max(1, batch_size or settings.warmup_batch_size)
+    return [WARMUP_TEXTS[i % len(WARMUP_TEXTS)] for i in range(batch_size)]
+
+
+def build_inference_tool():
+    # Tool modules are imported here, not at the top, so that importing
+    # the app does not load torch and transformers
+    if settings.inference_mode == "remote":
+        from app.tools.remote_inference import RemoteInferenceTool
+
+        return RemoteInferenceTool()
+    if settings.inference_mode == "local":
+        from app.tools.inference_tool import InferenceTool
+
+        return InferenceTool()
+    raise ValueError(f"Unknown inference mode: {settings.inference_mode}")
+
+
+def build_appointment_tool():
+    from app.tools.appointment_tool import AppointmentTool
+
+    return AppointmentTool()
+
+
+def build_catalog_service():
+    from app.tools.catalog_service import CatalogService
+
+    return CatalogService()
+
+
+def build_data_tool(inference, catalog):
+    from app.tools.data_tool import DataTool
+
+    return DataTool(
+        embedder=inference.embed,
+        model_version=inference.model_version,
+        catalog_service=catalog,
+    )
+
+
+class ToolRegistry:
+    """The process-wide tools, built once when the app starts.
+
+    Tools that do not depend on each other (the intent model, the
+    appointment database and the service catalog) are built concurrently
+    on startup threads, then the data tool, then a warm-up batch goes
+    through the model so that its first real request does not pay for
+    lazy kernel initialization. Using a tool before all of that is done
+    raises ToolsNotReadyError.
+    """
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.ready_at = None
+        self.error = None
+        self.timings = {}
+        self._tools = {}
+        self._starting = None
+
+    @property
+    def ready(self):
+        return self.ready_at is not None
+
+    @property
+    def time_to_ready_s(self):
+        if self.ready_at is None:
+            return None
+        return self.ready_at - self.created_at
+
+    def _get(self, name):
+        if not self.ready:
+            raise ToolsNotReadyError(f"Tools are not ready ({name})")
+        return self._tools[name]
+
+    @property
+    def inference(self):
+        return self._get("inference")
+
+    @property
+    def appointments(self):
+        return self._get("appointments")
+
+    @property
+    def catalog(self):
+        return self._get("catalog")
+
+    @property
+    def data(self):
+        return self._get("data")
+
+    def _timed(self, name, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        self.timings[name] = time.perf_counter() - started
+        return result
+
+    async def _start(self):
+        loop = asyncio.get_running_loop()
+        # Startup threads of their own, so that nothing is left running in
+        # the request executors (or in a pre-fork master) afterwards
+        with ThreadPoolExecutor(
+            max_workers=3, thread_name_prefix="startup"
+        ) as pool:
+            inference, appointments, catalog = await asyncio.gather(
+                loop.run_in_executor(
+                    pool, self._timed, "inference", build_inference_tool
+                ),
+                loop.run_in_executor(
+                    pool,
+                    self._timed,
+                    "appointments",
+                    build_appointment_tool,
+                ),
+                loop.run_in_executor(
+                    pool, self._timed, "catalog", build_catalog_service
+                ),
+            )
+            data = await loop.run_in_executor(
+                pool, self._timed, "data", build_data_tool, inference, catalog
+            )
+            if settings.warmup_enabled:
+                await loop.run_in_executor(
+                    pool,
+                    self._timed,
+                    "warmup",
+                    inference.warm_up,
+                    warmup_texts(),
+                )
+        self._tools = {
+            "inference": inference,
+            "appointments": appointments,
+            "catalog": catalog,
+            "data": data,
+        }
+        self.ready_at = time.perf_counter()
+
+    async def astart(self):
+        """Build the tools; concurrent callers share one startup."""
+        if self.ready:
+            return
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self._start())
+        try:
+            await asyncio.shield(self._starting)
+        except Exception as e:
+            self.error = e
+            self._starting = None
+            raise
+
+    def start(self):
+        """Blocking astart() for callers without an event loop."""
+        asyncio.run(self.astart())
+
+    def status(self):
+        return {
+            "status": (
+                "ready"
+                if self.ready
+                else "failed" if self.error is not None else "starting"
+            ),
+            "time_to_ready_s": self.time_to_ready_s,
+            "timings_s": dict(self.timings),
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+registry = ToolRegistry()
@@ -0,0 +1,367 @@
+"""Client side of the out-of-process inference server.
+
+Model calls are sent to ``python -m app.inference_server`` over a unix
+socket. Every message is one frame: a 9-byte header (payload length,
+request id, op code) followed by the payload. Requests are pipelined:
+each connection carries any number of requests in flight, and replies
+come back in completion order, matched up by request id.
+
+Payloads by op code:
+
+- PREDICT: the query as UTF-8; the reply is the confidence as a double
+  followed by the intent label as UTF-8.
+- PREDICT_BATCH: a text count, then each text as length + UTF-8; the
+  reply is a count, then for each text its confidence as a double and
+  its label as length + UTF-8.
+- EMBED: a text count, then each text as length + UTF-8; the reply is
+  rows and columns followed by the float32 matrix.
+- STATS: empty; the reply is the server's stats as JSON.
+- ERROR (replies only): the error message as UTF-8.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import struct
+import threading
+import weakref
+
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import instrument_tool
+from app.tools.datetime_extractor import DateTimeExtractor
+from app.tools.intent_responses import intent_response
+
+PREDICT = 1
+EMBED = 2
+STATS = 3
+PREDICT_BATCH = 4
+ERROR = 255
+
+HEADER = struct.Struct("!IIB")
+CONFIDENCE = struct.Struct("!d")
+LENGTH = struct.Struct("!I")
+SHAPE = struct.Struct("!II")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+_clients = weakref.WeakSet()
+
+
+class RemoteInferenceError(RuntimeError):
+    """The inference server failed to handle a request."""
+
+
+def encode_frame(request_id, op, payload=b""):
+    return HEADER.pack(len(payload), request_id, op) + payload
+
+
+async def read_frame(reader):
+    """Return (request_id, op, payload) of the next frame."""
+    length, request_id, op = HEADER.unpack(
+        await reader.readexactly(HEADER.size)
+    )
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds the limit")
+    return request_id, op, await reader.readexactly(length)
+
+
+def encode_prediction(label, confidence):
+    return CONFIDENCE.pack(confidence) + label.encode()
+
+
+def decode_prediction(payload):
+    (confidence,) = CONFIDENCE.unpack_from(payload)
+    return payload[CONFIDENCE.size :].decode(), confidence
+
+
+def encode_predictions(predictions):
+    parts = [LENGTH.pack(len(predictions))]
+    for label, confidence in predictions:
+        data = label.encode()
+        parts.append(CONFIDENCE.pack(confidence) + LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_predictions(payload):
+    (count,) = LENGTH.unpack_from(payload)
+    offset = LENGTH.size
+    predictions = []
+    for _ in range(count):
+        (confidence,) = CONFIDENCE.unpack_from(payload, offset)
+        offset += CONFIDENCE.size
+        (length,) = LENGTH.unpack_from(payload, offset)
+        offset += LENGTH.size
+        label = payload[offset : offset + length].decode()
+        offset += length
+        predictions.append((label, confidence))
+    return predictions
+
+
+def encode_texts(texts):
+    encoded = [text.encode() for text in texts]
+    return LENGTH.pack(len(encoded)) + b"".join(
+        LENGTH.pack(len(data)) + data for data in encoded
+    )
+
+
+def decode_texts(payload):
+    (count,) = LENGTH.unpack_from(payload)
+    offset = LENGTH.size
+    texts = []
+    for _ in range(count):
+        (length,) = LENGTH.unpack_from(payload, offset)
+        offset += LENGTH.size
+        texts.append(payload[offset : offset + length].decode())
+        offset += length
+    return texts
+
+
+def encode_matrix(array):
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    if array.ndim != 2:
+        array = array.reshape(len(array), -1)
+    return SHAPE.pack(*array.shape) + array.tobytes()
+
+
+def decode_matrix(payload):
+    rows, cols = SHAPE.unpack_from(payload)
+    return np.frombuffer(
+        payload, dtype=np.float32, count=rows * cols, offset=SHAPE.size
+    ).reshape(rows, cols)
+
+
+class _Connection:
+    """One pipelined connection; lives on the client's event loop."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.next_id = 0
+        self.closed = False
+        self.reader_task = asyncio.get_running_loop().create_task(
+            self._read_replies()
+        )
+
+    async def call(self, op, payload):
+        if self.closed:
+            raise ConnectionError("Inference server connection closed")
+        self.next_id = (self.next_id + 1) & 0xFFFFFFFF
+        request_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            self.writer.write(encode_frame(request_id, op, payload))
+            await self.writer.drain()
+            return await future
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def _read_replies(self):
+        error = ConnectionError("Inference server connection closed")
+        try:
+            while True:
+                request_id, op, payload = await read_frame(self.reader)
+                future = self.pending.get(request_id)
+                if future is not None and not future.done():
+                    future.set_result((op, payload))
+        except Exception as e:
+            error = ConnectionError(f"Inference server connection lost: {e}")
+        finally:
+            # Also when the task is cancelled, so that no caller waits on
+            # a reply that will never be read
+            self.closed = True
+            self.writer.close()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+
+class RemoteInferenceTool:
+    """Stand-in for InferenceTool that runs the model in the server.
+
+    It offers the InferenceTool methods the workflow and API use. Calls
+    may come from any thread or event loop: they are handed to a private
+    event loop thread that owns the connections, like the intent batcher
+    owns its worker thread. Date/time extraction needs no model and stays
+    in this process.
+    """
+
+    def __init__(
+        self,
+        socket_path=None,
+        connections=None,
+        timeout_s=None,
+        connect_timeout_s=None,
+    ):
+        self.socket_path = socket_path or settings.inference_socket_path
+        self.connections = max(
+            1, connections or settings.inference_remote_connections
+        )
+        self.timeout_s = timeout_s or settings.inference_remote_timeout_s
+        self.connect_timeout_s = (
+            connect_timeout_s or settings.inference_remote_connect_timeout_s
+        )
+        self.datetime_extractor = DateTimeExtractor()
+        self._reset()
+        _clients.add(self)
+
+        # Waits for the server, so the API can start alongside it
+        self.model_version = tuple(self._stats()["model_version"])
+
+    def _reset(self):
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._connect_lock = None
+        self._pool = []
+        self._next = 0
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._connect_lock = asyncio.Lock()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="inference-client",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+    def _submit(self, op, payload=b""):
+        """Send a request; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(
+            self._call(op, payload), self._ensure_loop()
+        )
+
+    async def _call(self, op, payload):
+        connection = await self._connection()
+        op, reply = await asyncio.wait_for(
+            connection.call(op, payload), self.timeout_s
+        )
+        if op == ERROR:
+            raise RemoteInferenceError(reply.decode())
+        return reply
+
+    async def _connection(self):
+        # Connections are opened on demand up to the configured count and
+        # then used round-robin; broken ones are replaced.
+        self._pool = [conn for conn in self._pool if not conn.closed]
+        if len(self._pool) < self.connections:
+            async with self._connect_lock:
+                if len(self._pool) < self.connections:
+                    # Opened before self._pool is looked up: another call
+                    # may replace the list while this one waits
+                    connection = await self._open()
+                    self._pool.append(connection)
+        self._next = (self._next + 1) % len(self._pool)
+        return self._pool[self._next]
+
+    async def _open(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout_s
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.socket_path
+                )
+                return _Connection(reader, writer)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if loop.time() >= deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+    def _stats(self):
+        return json.loads(self._submit(STATS).result())
+
+    @instrument_tool("inference")
+    def predict_intent(self, text):
+        return decode_prediction(self._submit(PREDICT, text.encode()).result())
+
+    @instrument_tool("inference")
+    async def apredict_intent(self, text):
+        return decode_prediction(
+            await asyncio.wrap_future(self._submit(PREDICT, text.encode()))
+        )
+
+    @instrument_tool("inference")
+    async def apredict_intent_batch(self, texts):
+        return decode_predictions(
+            await asyncio.wrap_future(
+                self._submit(PREDICT_BATCH, encode_texts(list(texts)))
+            )
+        )
+
+    @instrument_tool("inference")
+    def embed(self, texts, batch_size=64):
+        return decode_matrix(
+            self._submit(EMBED, encode_texts(list(texts))).result()
+        )
+
+    @instrument_tool("inference")
+    def extract_datetime(self, text, reference=None):
+        return self.datetime_extractor.extract(text, reference)
+
+    def predict_and_respond(self, text):
+        intent, confidence = self.predict_intent(text)
+        return intent_response(intent, confidence)
+
+    async def apredict_and_respond(self, text):
+        intent, confidence = await self.apredict_intent(text)
+        return intent_response(intent, confidence)
+
+    def warm_up(self, texts):
+        # Opens the connections; the server warms up its own model
+        futures = [self._submit(PREDICT, text.encode()) for text in texts]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Close the connections and stop the event loop thread."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_pool(), loop).result(
+            self.timeout_s
+        )
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def _close_pool(self):
+        pool, self._pool = self._pool, []
+        for connection in pool:
+            connection.writer.close()
+        await asyncio.gather(
+            *(connection.reader_task for connection in pool),
+            return_exceptions=True,
+        )
+
+    def share_memory(self):
+        # The model lives in the inference server
+        pass
+
+    def batching_stats(self):
+        return self._stats()["batching"]
+
+    def cache_stats(self):
+        return self._stats()["cache"]
+
+    def cascade_stats(self):
+        return self._stats()["cascade"]
+
+
+def _close_clients():
+    for client in list(_clients):
+        client.close()
+
+
+def _reset_clients_after_fork():
+    # The event loop thread and its connections stay with the parent
+    for client in list(_clients):
+        client._reset()
+
+
+atexit.register(_close_clients)
+os.register_at_fork(after_in_child=_reset_clients_after_fork)
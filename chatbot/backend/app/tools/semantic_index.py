@@ -0,0 +1,200 @@
+import contextlib
+import logging
+import os
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticHit(NamedTuple):
+    index: int
+    score: float
+    key: str
+
+
+class _Rows(NamedTuple):
+    matrix: np.ndarray
+    texts: tuple
+    keys: tuple
+
+
+class SemanticIndex:
+    """Cosine top-k search over row texts.
+
+    Row vectors are L2-normalized and kept in one contiguous float32
+    matrix, so a query costs a single matrix-vector product. Each row has
+    a key (by default its text) that search hits carry. The matrix is
+    persisted to ``path`` together with the row texts, keys and the
+    encoder version; on startup only rows whose text is new, or all rows
+    if the encoder changed, are embedded.
+
+    Writers hold a lock and then publish the rows as one immutable
+    (matrix, texts, keys) tuple, which is all a search reads, so it never
+    sees a half-updated index.
+    """
+
+    def __init__(self, embed, path=None, model_version=None):
+        self.embed = embed
+        self.path = path
+        self.model_version = str(model_version)
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._buffer = None
+        self._rows = _Rows(np.zeros((0, 0), dtype=np.float32), (), ())
+        self._load()
+
+    @property
+    def matrix(self):
+        return self._rows.matrix
+
+    @property
+    def keys(self):
+        return list(self._rows.keys)
+
+    def __len__(self):
+        return len(self._rows.keys)
+
+    def _encode(self, texts):
+        vectors = np.asarray(self.embed(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _publish(self, size, texts, keys):
+        # Rows below ``size`` are never written again: add() appends past
+        # them and sync() fills a new buffer, so the view stays valid
+        self._rows = _Rows(self._buffer[:size], tuple(texts), tuple(keys))
+
+    def _reserve(self, size, rows, dim):
+        if self._buffer is not None and self._buffer.shape[0] >= rows:
+            return
+        # Grow geometrically so repeated appends stay amortized O(1) per row
+        capacity = max(rows, 16)
+        if self._buffer is not None:
+            capacity = max(capacity, 2 * self._buffer.shape[0])
+        buffer = np.empty((capacity, dim), dtype=np.float32)
+        if self._buffer is not None:
+            buffer[:size] = self._buffer[:size]
+        self._buffer = buffer
+
+    def add(self, texts, keys=None):
+        """Append rows, embedding only texts not already indexed."""
+        texts = list(texts)
+        pairs = dict(zip(texts, texts if keys is None else keys))
+        with self._lock:
+            rows = self._rows
+            new = [text for text in pairs if text not in self._positions]
+            if not new:
+                return 0
+            vectors = self._encode(new)
+            size = len(rows.keys)
+            self._reserve(size, size + len(new), vectors.shape[1])
+            self._buffer[size : size + len(new)] = vectors
+            for offset, text in enumerate(new):
+                self._positions[text] = size + offset
+            self._publish(
+                size + len(new),
+                rows.texts + tuple(new),
+                rows.keys + tuple(pairs[text] for text in new),
+            )
+            self.save()
+        return len(new)
+
+    def sync(self, texts, keys=None):
+        """Make the index hold exactly ``texts`` (with ``keys``), in order.
+
+        Vectors of texts that were already indexed are reused; only new
+        texts go through the encoder. The result is persisted if anything
+        changed.
+        """
+        texts = list(texts)
+        pairs = dict(zip(texts, texts if keys is None else keys))
+        texts, keys = list(pairs), list(pairs.values())
+        with self._lock:
+            if (
+                tuple(texts) == self._rows.texts
+                and tuple(keys) == self._rows.keys
+            ):
+                return 0
+
+            missing = [text for text in texts if text not in self._positions]
+            fresh = (
+                dict(zip(missing, self._encode(missing))) if missing else {}
+            )
+            if self._buffer is not None:
+                dim = self._buffer.shape[1]
+            elif fresh:
+                dim = next(iter(fresh.values())).shape[0]
+            else:
+                dim = 0
+            # Leave headroom so that follow-up add() calls do not reallocate
+            capacity = max(len(texts) + len(texts) // 4, 16)
+            buffer = np.empty((capacity, dim), dtype=np.float32)
+            for row, text in enumerate(texts):
+                if text in fresh:
+                    buffer[row] = fresh[text]
+                else:
+                    buffer[row] = self._buffer[self._positions[text]]
+
+            self._buffer = buffer
+            self._positions = {text: row for row, text in enumerate(texts)}
+            self._publish(len(texts), texts, keys)
+            self.save()
+        return len(missing)
+
+    def search(self, query, k=1):
+        rows = self._rows
+        size = len(rows.keys)
+        if not size:
+            return []
+        scores = rows.matrix @ self._encode([query])[0]
+        k = min(k, size)
+        if k < size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            SemanticHit(int(i), float(scores[i]), rows.keys[i]) for i in top
+        ]
+
+    def save(self):
+        if not self.path:
+            return
+        rows = self._rows
+        tmp_path = self.path + ".tmp.npz"
+        try:
+            np.savez(
+                tmp_path,
+                matrix=rows.matrix,
+                texts=np.array(rows.texts, dtype=np.str_),
+                keys=np.array(rows.keys, dtype=np.str_),
+                model_version=np.array(self.model_version),
+            )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # E.g. a read-only dataset directory; the rows are embedded
+            # again on the next start
+            logger.warning("Could not save %s: %s", self.path, e)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with np.load(self.path) as data:
+            if str(data["model_version"]) != self.model_version:
+                return
+            matrix = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+            keys = [str(key) for key in data["keys"]]
+            # Files written before rows had keys apart from their texts
+            texts = (
+                [str(text) for text in data["texts"]]
+                if "texts" in data.files
+                else keys
+            )
+        self._buffer = matrix
+        self._positions = {text: row for row, text in enumerate(texts)}
+        self._publish(len(keys), texts, keys)
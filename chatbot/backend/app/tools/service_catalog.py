@@ -0,0 +1,187 @@
+import csv
+import re
+from types import MappingProxyType
+from typing import NamedTuple
+
+# Short names customers use for a service, mapped to the catalog name
+SERVICE_ALIASES = {
+    "neck": "Neck and Shoulder Massage",
+    "shoulder": "Neck and Shoulder Massage",
+    "deep tissue": "Deep Tissue Massage",
+    "thai": "Thai Massage",
+    "hot stone": "Hot Stone Massage",
+    "swedish": "Swedish Massage",
+    "aromatherapy": "Aromatherapy Massage",
+    "sports": "Sports Massage",
+    "prenatal": "Prenatal Massage",
+    "reflexology": "Reflexology",
+    "full body": "Full Body Relaxation",
+}
+
+# Descriptions shown by the /services endpoint; the dataset has none
+SERVICE_DESCRIPTIONS = {
+    "Swedish Massage": "Relaxing full-body massage",
+    "Deep Tissue Massage": "Intense massage for muscle relief",
+    "Hot Stone Massage": "Massage with heated stones",
+    "Neck and Shoulder Massage": "Targeted upper body massage",
+    "Aromatherapy Massage": "Massage with essential oils",
+    "Thai Massage": "Traditional Thai stretching massage",
+    "Sports Massage": "Massage for athletes and active people",
+    "Prenatal Massage": "Safe massage for expecting mothers",
+}
+
+# Words that never say which service is meant; dropped from queries and
+# names before matching
+STOPWORDS = frozenset(
+    {
+        "a", "about", "an", "and", "any", "are", "at", "be", "book",
+        "booking", "can", "charge", "cost", "costs", "could", "do", "does",
+        "for", "get", "have", "how", "i", "id", "im", "in", "is", "it",
+        "like", "me", "much", "my", "of", "on", "one", "or", "please",
+        "price", "prices", "session", "some", "that", "the", "this", "to",
+        "want", "we", "what", "whats", "with", "would", "you", "your",
+    }
+)  # fmt: skip
+# Name words shared by most services, which identify none of them
+GENERIC_NAME_WORDS = frozenset({"massage", "therapy"})
+# Share of a name's remaining words a query must contain to match it
+MIN_NAME_COVERAGE = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def stem(token):
+    # Plurals only: "stones" finds "Hot Stone", "stress" stays as it is
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def match_words(text):
+    """The words of ``text`` that take part in search()."""
+    return frozenset(
+        stem(token)
+        for token in tokenize(text)
+        if token not in STOPWORDS and token not in GENERIC_NAME_WORDS
+    )
+
+
+def normalize_name(text):
+    return " ".join(tokenize(text))
+
+
+class ServiceRecord(NamedTuple):
+    name: str
+    price: float
+    duration: int
+
+    def describe(self):
+        return f"The {self.name} costs ${self.price} and lasts for {self.duration} minutes."
+
+
+class ServiceCatalog:
+    """Immutable lookup structures over the service dataset.
+
+    Everything is computed once at construction; lookups are dict and set
+    operations only.
+    """
+
+    def __init__(self, records, aliases=SERVICE_ALIASES):
+        self.records = tuple(records)
+        self.by_name = MappingProxyType(
+            {normalize_name(record.name): record for record in self.records}
+        )
+        # Aliases whose target is not in the dataset are dropped
+        self.aliases = MappingProxyType(
+            {
+                alias: self.by_name[normalize_name(name)]
+                for alias, name in aliases.items()
+                if normalize_name(name) in self.by_name
+            }
+        )
+
+        # The word sets a record can be matched on, its name and each of
+        # its aliases, and for each word the positions of those records
+        alias_names = {}
+        for alias, record in self.aliases.items():
+            alias_names.setdefault(record.name, []).append(alias)
+        self.name_words = tuple(
+            tuple(
+                words
+                for words in map(
+                    match_words,
+                    [record.name, *alias_names.get(record.name, ())],
+                )
+                if words
+            )
+            for record in self.records
+        )
+        word_index = {}
+        for position, variants in enumerate(self.name_words):
+            for words in variants:
+                for word in words:
+                    word_index.setdefault(word, set()).add(position)
+        self.word_index = MappingProxyType(
+            {
+                word: frozenset(positions)
+                for word, positions in word_index.items()
+            }
+        )
+
+    @classmethod
+    def from_dataframe(cls, data, aliases=SERVICE_ALIASES):
+        records = [
+            ServiceRecord(
+                name=str(row.Massage_Type),
+                price=float(row.Avg_Spending),
+                duration=int(row.Duration_Minutes),
+            )
+            for row in data.itertuples(index=False)
+        ]
+        return cls(records, aliases)
+
+    @classmethod
+    def from_csv(cls, csv_path, aliases=SERVICE_ALIASES):
+        # Plain csv rather than pandas keeps pandas off the startup path
+        with open(csv_path, newline="") as f:
+            records = [
+                ServiceRecord(
+                    name=row["Massage_Type"],
+                    price=float(row["Avg_Spending"]),
+                    duration=int(row["Duration_Minutes"]),
+                )
+                for row in csv.DictReader(f)
+            ]
+        return cls(records, aliases)
+
+    def get(self, name):
+        return self.by_name.get(normalize_name(name))
+
+    def search(self, query):
+        """The record whose name or alias the query covers best, or None.
+
+        Stopwords and generic words like "massage" are ignored on both
+        sides, so a query only matches on words that tell services apart,
+        and it has to contain at least MIN_NAME_COVERAGE of a name's
+        words. Ties go to more matched words, then higher coverage, then
+        catalog order.
+        """
+        words = match_words(query)
+        candidates = set()
+        for word in words:
+            candidates.update(self.word_index.get(word, ()))
+        best = None
+        for position in candidates:
+            for name_words in self.name_words[position]:
+                matched = len(name_words & words)
+                coverage = matched / len(name_words)
+                if coverage < MIN_NAME_COVERAGE:
+                    continue
+                key = (-matched, -coverage, position)
+                if best is None or key < best:
+                    best = key
+        return None if best is None else self.records[best[2]]
@@ -0,0 +1,78 @@
+"""Per-message appointment query cost as the table and a user's history grow.
+
+Compares the old full-history fetch (filtered in Python) with the indexed
+queries the workflow now uses.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_appointment_queries [--rows 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+
+from app.tools.appointment_tool import INSERT_APPOINTMENT_SQL, AppointmentTool
+from benchmarks.common import measure, print_json
+
+
+def populate(tool, rows, users, heavy_user_rows):
+    batch = []
+    with tool.pool.connection() as conn:
+        for i in range(rows):
+            batch.append((f"user-{i % users}", "Thai Massage", "2025-01-01"))
+            if len(batch) == 10000:
+                conn.executemany(INSERT_APPOINTMENT_SQL, batch)
+                batch = []
+        batch.extend(
+            ("heavy-user", "Swedish Massage", "2025-01-01")
+            for _ in range(heavy_user_rows)
+        )
+        conn.executemany(INSERT_APPOINTMENT_SQL, batch)
+
+
+def full_history_latest_pending(tool, user_id):
+    pending = [a for a in tool.get_appointments(user_id) if a[4] == "pending"]
+    return pending[-1] if pending else None
+
+
+def full_history_summary(tool, user_id):
+    appointments = tool.get_appointments(user_id)
+    return len(appointments), appointments[-1] if appointments else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--heavy-user-rows", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tool = AppointmentTool(os.path.join(tmp, "appointments.db"))
+        populate(tool, args.rows, args.users, args.heavy_user_rows)
+        calls = [(tool, "heavy-user")] * args.repeat
+        print_json(
+            {
+                "rows": args.rows + args.heavy_user_rows,
+                "user_rows": args.heavy_user_rows,
+                "full_history": {
+                    "latest_pending": measure(
+                        full_history_latest_pending, calls
+                    ),
+                    "summary": measure(full_history_summary, calls),
+                },
+                "indexed": {
+                    "latest_pending": measure(
+                        AppointmentTool.get_latest_pending_appointment, calls
+                    ),
+                    "summary": measure(
+                        AppointmentTool.get_appointment_summary, calls
+                    ),
+                },
+            }
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Write/read throughput of AppointmentTool against per-call connections.
+
+The baseline opens and closes a new sqlite3 connection (default rollback
+journal) for every call, as AppointmentTool used to.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_appointments [--ops 2000] [--threads 8]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.tools.appointment_tool import (CREATE_APPOINTMENTS_SQL,
+                                        INSERT_APPOINTMENT_SQL,
+                                        SELECT_USER_APPOINTMENTS_SQL,
+                                        AppointmentTool)
+from benchmarks.common import print_json
+
+
+class PerCallConnections:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute(CREATE_APPOINTMENTS_SQL)
+        conn.commit()
+        conn.close()
+
+    def add_appointment(self, user_id, service, date_time):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(INSERT_APPOINTMENT_SQL, (user_id, service, date_time))
+        conn.commit()
+        conn.close()
+
+    def get_appointments(self, user_id):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            SELECT_USER_APPOINTMENTS_SQL, (user_id,)
+        ).fetchall()
+        conn.close()
+        return rows
+
+
+def throughput(fn, ops, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(fn, range(ops)))
+    return ops / (time.perf_counter() - started)
+
+
+def run(tool, ops, threads, users):
+    def write(i):
+        tool.add_appointment(
+            f"user-{i % users}", "Thai Massage", "2025-01-01 10:00"
+        )
+
+    def read(i):
+        tool.get_appointments(f"user-{i % users}")
+
+    return {
+        "writes_per_s": throughput(write, ops, threads),
+        "reads_per_s": throughput(read, ops, threads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = PerCallConnections(os.path.join(tmp, "per_call.db"))
+        pooled = AppointmentTool(os.path.join(tmp, "pooled.db"))
+        print_json(
+            {
+                "ops": args.ops,
+                "threads": args.threads,
+                "per_call_connections": run(
+                    baseline, args.ops, args.threads, args.users
+                ),
+                "pooled_wal": run(pooled, args.ops, args.threads, args.users),
+            }
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Throughput of /chat/batch against the same messages sent to /chat.
+
+Point it at a running backend. Messages from the training data are spread
+over --users users; /chat gets them from --concurrency clients, one call
+per message and each user's messages in order, /chat/batch in batches of
+--batch-size:
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.bench_chat_batch --url http://localhost:8000 \\
+        --messages 1000 --users 100
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from benchmarks.common import TRAINING_DATA, load_training_data, print_json
+
+
+def build_messages(texts, count, users):
+    return [
+        {"message": texts[i % len(texts)], "user_id": f"bench-{i % users}"}
+        for i in range(count)
+    ]
+
+
+async def run_single(client, messages, concurrency):
+    by_user = {}
+    for message in messages:
+        by_user.setdefault(message["user_id"], []).append(message)
+    queue = asyncio.Queue()
+    for user_messages in by_user.values():
+        queue.put_nowait(user_messages)
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            session_id = None
+            for message in queue.get_nowait():
+                response = await client.post(
+                    "/api/v1/chat", json={**message, "session_id": session_id}
+                )
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                session_id = response.json()["session_id"]
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return errors
+
+
+async def run_batch(client, messages, batch_size):
+    errors = 0
+    for start in range(0, len(messages), batch_size):
+        response = await client.post(
+            "/api/v1/chat/batch",
+            json={"messages": messages[start : start + batch_size]},
+        )
+        response.raise_for_status()
+        errors += sum(
+            result["error"] is not None
+            for result in response.json()["results"]
+        )
+    return errors
+
+
+async def timed(coro, count):
+    started = time.perf_counter()
+    errors = await coro
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "messages_per_s": count / elapsed,
+        "errors": errors,
+    }
+
+
+async def run(args):
+    texts = [example["text"] for example in load_training_data(args.data)]
+    messages = build_messages(texts, args.messages, args.users)
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout
+    ) as client:
+        return {
+            "messages": len(messages),
+            "users": args.users,
+            "chat": await timed(
+                run_single(client, messages, args.concurrency), len(messages)
+            ),
+            "chat_batch": await timed(
+                run_batch(client, messages, args.batch_size), len(messages)
+            ),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--data", default=TRAINING_DATA)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    print_json(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Per-query cost of DataTool.retrieve_and_generate.
+
+Compares the catalog index with the previous per-query pandas filtering,
+which is reproduced here as the baseline.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_data_tool [--csv PATH] [--repeat 200]
+"""
+
+import argparse
+
+import pandas as pd
+from app.tools.data_tool import DataTool
+from benchmarks.common import SERVICES_CSV, measure, print_json
+
+QUERIES = [
+    "How much is a thai massage?",
+    "what does the deep tissue cost",
+    "price of hot stone please",
+    "how much for reflexology",
+    "cost of a myofascial release session",
+    "trigger point therapy price",
+    "how much is a massage",
+    "what about cervical spine work",
+    "do you do underwater basket weaving",
+]
+
+
+class PandasDataTool:
+    def __init__(self, csv_path):
+        self.data = pd.read_csv(csv_path)
+
+    def retrieve_and_generate(self, query):
+        query_lower = query.lower()
+        massage_mappings = {
+            "neck": "Neck and Shoulder Massage",
+            "deep tissue": "Deep Tissue Massage",
+            "thai": "Thai Massage",
+            "hot stone": "Hot Stone Massage",
+            "swedish": "Swedish Massage",
+            "aromatherapy": "Aromatherapy Massage",
+            "sports": "Sports Massage",
+            "prenatal": "Prenatal Massage",
+            "reflexology": "Reflexology",
+            "full body": "Full Body Relaxation",
+        }
+        best_match = None
+        for key, massage_type in massage_mappings.items():
+            if key in query_lower:
+                best_match = massage_type
+                break
+        if best_match:
+            matching_row = self.data[self.data["Massage_Type"] == best_match]
+            if not matching_row.empty:
+                row = matching_row.iloc[0]
+                return f"The {row['Massage_Type']} costs ${row['Avg_Spending']} and lasts for {row['Duration_Minutes']} minutes."
+
+        keywords = query_lower.split()
+        relevant_rows = self.data[
+            self.data["Massage_Type"]
+            .str.lower()
+            .str.contains("|".join(keywords), na=False)
+        ]
+        if relevant_rows.empty:
+            return "Sorry"
+
+        def count_matches(row):
+            massage_type = row["Massage_Type"].lower()
+            return sum(1 for keyword in keywords if keyword in massage_type)
+
+        relevant_rows = relevant_rows.copy()
+        relevant_rows["match_count"] = relevant_rows.apply(
+            count_matches, axis=1
+        )
+        relevant_rows = relevant_rows.sort_values(
+            by="match_count", ascending=False
+        )
+        top_row = relevant_rows.iloc[0]
+        return f"The {top_row['Massage_Type']} costs ${top_row['Avg_Spending']} and lasts for {top_row['Duration_Minutes']} minutes."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=SERVICES_CSV)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    calls = [(query,) for query in QUERIES]
+    baseline = PandasDataTool(args.csv)
+    indexed = DataTool(args.csv)
+    print_json(
+        {
+            "queries": len(QUERIES),
+            "pandas": measure(
+                baseline.retrieve_and_generate, calls, args.repeat
+            ),
+            "catalog_index": measure(
+                indexed.retrieve_and_generate, calls, args.repeat
+            ),
+            "answers": {
+                query: indexed.retrieve_and_generate(query)
+                for query in QUERIES
+            },
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Accuracy and per-extraction cost of booking date/time extraction.
+
+Runs a correctness corpus, resolved against a fixed reference time,
+through DateTimeExtractor (cold and warm cache) and through the previous
+approach of calling dateutil's fuzzy parser on the whole message.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_datetime [--repeat 200]
+"""
+
+import argparse
+from datetime import datetime
+
+from app.tools.datetime_extractor import DATETIME_FORMAT, DateTimeExtractor
+from benchmarks.common import measure, print_json
+from dateutil import parser
+
+# Wednesday
+REFERENCE = datetime(2025, 1, 15, 10, 0)
+
+CORPUS = [
+    ("Book me a massage tomorrow at 3pm", "2025-01-16 15:00"),
+    ("can I come in today at 5:30 pm", "2025-01-15 17:30"),
+    ("tonight at 7pm please", "2025-01-15 19:00"),
+    ("next Friday at 10am", "2025-01-17 10:00"),
+    ("this friday", "2025-01-17 00:00"),
+    ("on monday at 2", "2025-01-20 14:00"),
+    ("next wednesday at noon", "2025-01-22 12:00"),
+    ("wednesday 9:15", "2025-01-15 09:15"),
+    ("day after tomorrow at 11 am", "2025-01-17 11:00"),
+    ("in 3 days at 4pm", "2025-01-18 16:00"),
+    ("sometime next week", "2025-01-22 00:00"),
+    ("2025-02-03 14:30", "2025-02-03 14:30"),
+    ("schedule it for 2025-03-10", "2025-03-10 00:00"),
+    ("1/20 at 1pm", "2025-01-20 13:00"),
+    ("reschedule to 2/14/2025 at 6:45pm", "2025-02-14 18:45"),
+    ("March 3rd at 9am", "2025-03-03 09:00"),
+    ("the 5th of February at 15:00", "2025-02-05 15:00"),
+    ("Jan 31, 2025 at 8 p.m.", "2025-01-31 20:00"),
+    ("book a thai massage at 4:30pm", "2025-01-15 16:30"),
+    ("tomorrow at midnight", "2025-01-16 00:00"),
+    ("the 20th at 2pm", "2025-01-20 14:00"),
+    ("book at 3pm on the 20th", "2025-01-20 15:00"),
+    ("on the 10th", "2025-02-10 00:00"),
+    ("Saturday at 12pm", "2025-01-18 12:00"),
+    ("tmrw 8am", "2025-01-16 08:00"),
+    ("I'd like a deep tissue massage", None),
+    ("cancel my appointment", None),
+    ("how much is the hot stone massage?", None),
+    ("book a 90 min deep tissue", None),
+    ("may I book a thai massage", None),
+    ("next week friday at 3pm", "2025-01-24 15:00"),
+    ("monday next week", "2025-01-20 00:00"),
+    ("may 20th at 10am", "2025-05-20 10:00"),
+]
+
+
+def legacy_extract(text, reference):
+    try:
+        default = reference.replace(hour=0, minute=0)
+        parsed = parser.parse(text, fuzzy=True, default=default)
+    except (ValueError, OverflowError):
+        return None
+    return parsed.strftime(DATETIME_FORMAT)
+
+
+def accuracy(extract):
+    failures = []
+    for text, expected in CORPUS:
+        got = extract(text, REFERENCE)
+        if got != expected:
+            failures.append({"text": text, "expected": expected, "got": got})
+    return {
+        "correct": len(CORPUS) - len(failures),
+        "total": len(CORPUS),
+        "accuracy": (len(CORPUS) - len(failures)) / len(CORPUS),
+        "failures": failures,
+    }
+
+
+def main():
+    parser_ = argparse.ArgumentParser(description=__doc__)
+    parser_.add_argument("--repeat", type=int, default=200)
+    args = parser_.parse_args()
+
+    args_list = [(text, REFERENCE) for text, _ in CORPUS]
+    uncached = DateTimeExtractor(cache_size=0)
+    cached = DateTimeExtractor()
+    measure(cached.extract, args_list)
+
+    print_json(
+        {
+            "reference": REFERENCE.isoformat(),
+            "accuracy": {
+                "legacy_dateutil": accuracy(legacy_extract),
+                "extractor": accuracy(uncached.extract),
+            },
+            "latency": {
+                "legacy_dateutil": measure(
+                    legacy_extract, args_list, args.repeat
+                ),
+                "extractor_uncached": measure(
+                    uncached.extract, args_list, args.repeat
+                ),
+                "extractor_cached": measure(
+                    cached.extract, args_list, args.repeat
+                ),
+            },
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare cold start and resident memory of the two model formats.
+
+Each format is loaded in a fresh interpreter so that import and page
+cache effects are measured the way a new worker would see them.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_model_load PICKLE_PATH ARTIFACT_DIR
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.common import BACKEND_DIR, print_json
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app.core.config import settings
+settings.inference_batching_enabled = False
+from app.tools.inference_tool import InferenceTool
+imported = time.perf_counter()
+tool = InferenceTool(model_path=sys.argv[1])
+loaded = time.perf_counter()
+tool.predict_intents(["book a thai massage"])
+first = time.perf_counter()
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+print(json.dumps({
+    "import_s": imported - started,
+    "load_s": loaded - imported,
+    "first_prediction_s": first - loaded,
+    "rss_mb": rss_kb / 1024.0,
+}))
+"""
+
+
+def probe(model_path):
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, model_path],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pickle_path")
+    parser.add_argument("artifact_path")
+    args = parser.parse_args()
+    print_json(
+        {
+            "pickle": probe(args.pickle_path),
+            "artifact": probe(args.artifact_path),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare fixed max_length padding with dynamic, length-bucketed padding.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_padding [--data PATH] [--batch-size 32]
+"""
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.tools.inference_tool import InferenceTool
+from benchmarks.common import (TRAINING_DATA, load_training_data,
+                               print_json, summarize)
+
+
+def run_mode(tool, mode, texts, labels, batch_size):
+    settings.inference_padding = mode
+    tool.predict_intents(texts[:batch_size])  # warm-up
+
+    single = []
+    predictions = []
+    for text in texts:
+        started = time.perf_counter()
+        predictions.append(tool.predict_intents([text])[0])
+        single.append(time.perf_counter() - started)
+
+    batched = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start : start + batch_size]
+        started = time.perf_counter()
+        tool.predict_intents(chunk)
+        batched.append((time.perf_counter() - started) / len(chunk))
+
+    correct = sum(
+        1 for (intent, _), label in zip(predictions, labels) if intent == label
+    )
+    return {
+        "accuracy": correct / len(labels),
+        "batch_1": summarize(single),
+        f"batch_{batch_size}_per_query": summarize(batched),
+    }, predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=TRAINING_DATA)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    settings.inference_batching_enabled = False
+    tool = InferenceTool()
+    examples = load_training_data(args.data)
+    texts = [example["text"] for example in examples]
+    labels = [example["intent"] for example in examples]
+    original_mode = settings.inference_padding
+
+    fixed, fixed_predictions = run_mode(
+        tool, "max_length", texts, labels, args.batch_size
+    )
+    dynamic, dynamic_predictions = run_mode(
+        tool, "dynamic", texts, labels, args.batch_size
+    )
+    settings.inference_padding = original_mode
+
+    agreement = sum(
+        1
+        for (a, _), (b, _) in zip(fixed_predictions, dynamic_predictions)
+        if a == b
+    )
+    max_delta = max(
+        abs(a - b)
+        for (_, a), (_, b) in zip(fixed_predictions, dynamic_predictions)
+    )
+    print_json(
+        {
+            "examples": len(texts),
+            "max_length": fixed,
+            "dynamic": dynamic,
+            "intent_agreement": agreement / len(texts),
+            "max_confidence_delta": max_delta,
+            "speedup_batch_1": fixed["batch_1"]["mean_ms"]
+            / max(dynamic["batch_1"]["mean_ms"], 1e-9),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
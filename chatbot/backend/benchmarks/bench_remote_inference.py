@@ -0,0 +1,105 @@
+"""Intent prediction in-process vs through app.inference_server.
+
+Starts an inference server on a temporary socket, then runs the same
+concurrent apredict_intent load against an in-process InferenceTool and
+against RemoteInferenceTool, reporting throughput and latency per
+concurrency level along with the server's batching stats:
+
+    INTENT_CASCADE_ENABLED=false INTENT_CACHE_SIZE=0 \\
+        python -m benchmarks.bench_remote_inference [--concurrency 1 8 64]
+
+The environment applies to both the server and the local tool; the
+settings above make every call reach the transformer.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.tools.inference_tool import InferenceTool
+from app.tools.remote_inference import RemoteInferenceTool
+from benchmarks.common import (BACKEND_DIR, TRAINING_DATA, load_training_data,
+                               print_json, summarize)
+
+
+async def run_load(tool, messages, concurrency, requests):
+    samples = []
+    queue = asyncio.Queue()
+    for i in range(requests):
+        # Numbered so that no two requests share an intent cache entry
+        queue.put_nowait(f"{messages[i % len(messages)]} {i}")
+
+    async def worker():
+        while not queue.empty():
+            text = queue.get_nowait()
+            started = time.perf_counter()
+            await tool.apredict_intent(text)
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"throughput_rps": requests / elapsed, **summarize(samples)}
+
+
+def start_server(socket_path, workers, log_path):
+    with open(log_path, "w") as log:
+        return subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "app.inference_server",
+                "--socket",
+                socket_path,
+                "--workers",
+                str(workers),
+            ],
+            env={**os.environ, "PYTHONPATH": BACKEND_DIR},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 64]
+    )
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--data", default=TRAINING_DATA)
+    args = parser.parse_args()
+
+    messages = [example["text"] for example in load_training_data(args.data)]
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "inference.sock")
+        server = start_server(
+            socket_path, args.server_workers, os.path.join(tmp, "server.log")
+        )
+        try:
+            local = InferenceTool()
+            remote = RemoteInferenceTool(
+                socket_path=socket_path, connections=args.connections
+            )
+            result = {"local": {}, "remote": {}}
+            for concurrency in args.concurrency:
+                for name, tool in (("local", local), ("remote", remote)):
+                    result[name][concurrency] = asyncio.run(
+                        run_load(tool, messages, concurrency, args.requests)
+                    )
+            result["server_batching"] = remote.batching_stats()
+            remote.close()
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+    print_json(result)
+
+
+if __name__ == "__main__":
+    main()
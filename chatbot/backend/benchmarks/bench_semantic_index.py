@@ -0,0 +1,56 @@
+"""Semantic index search and incremental update cost as the catalog grows.
+
+Uses random unit vectors in place of the encoder so that only the index
+itself is measured (query embedding is excluded).
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_semantic_index [--sizes 10 1000 50000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from app.tools.semantic_index import SemanticIndex
+from benchmarks.common import measure, print_json
+
+
+class RandomEncoder:
+    def __init__(self, dim, seed=0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, texts):
+        return self.rng.standard_normal((len(texts), self.dim))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 1000, 10000, 50000]
+    )
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        index = SemanticIndex(RandomEncoder(args.dim))
+        index.sync([f"service {i}" for i in range(size)])
+
+        started = time.perf_counter()
+        index.add([f"service {i}" for i in range(size, size + 10)])
+        add_ms = (time.perf_counter() - started) * 1000.0
+
+        results[str(size)] = {
+            "search": measure(
+                index.search, [("any query", args.k)] * args.repeat
+            ),
+            "add_10_rows_ms": add_ms,
+        }
+    print_json({"dim": args.dim, "k": args.k, "sizes": results})
+
+
+if __name__ == "__main__":
+    main()
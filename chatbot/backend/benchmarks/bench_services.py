@@ -0,0 +1,77 @@
+"""Per-request cost and bytes of /services.
+
+Compares the previous endpoint (ServiceInfo objects built and validated
+through response_model on every call) with the catalog snapshot (pre-encoded
+body, ETag) on a full 200 response and on a revalidation that gets a 304:
+
+    python -m benchmarks.bench_services [--repeat 2000]
+"""
+
+import argparse
+from typing import List
+
+from app.models.schemas import ServiceInfo
+from app.tools.catalog_service import CatalogService, etag_matches
+from benchmarks.common import measure, print_json
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+
+def build_app(catalog_service):
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=List[ServiceInfo])
+    async def legacy():
+        return [
+            ServiceInfo(
+                name=record.name,
+                price=record.price,
+                duration=record.duration,
+                description="",
+            )
+            for record in catalog_service.snapshot().catalog.records
+        ]
+
+    @app.get("/snapshot", response_model=List[ServiceInfo])
+    async def snapshot(request: Request):
+        current = catalog_service.snapshot()
+        headers = {"ETag": current.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), current.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            current.body, media_type="application/json", headers=headers
+        )
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    catalog_service = CatalogService(args.csv)
+    client = TestClient(build_app(catalog_service))
+    etag = catalog_service.snapshot().etag
+    cases = {
+        "legacy": ("/legacy", {}),
+        "snapshot": ("/snapshot", {}),
+        "snapshot_304": ("/snapshot", {"If-None-Match": etag}),
+    }
+
+    result = {}
+    for name, (path, headers) in cases.items():
+        response = client.get(path, headers=headers)
+        result[name] = {
+            "status": response.status_code,
+            "body_bytes": len(response.content),
+            "latency": measure(
+                lambda: client.get(path, headers=headers), [()], args.repeat
+            ),
+        }
+    print_json(result)
+
+
+if __name__ == "__main__":
+    main()
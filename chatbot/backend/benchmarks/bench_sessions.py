@@ -0,0 +1,136 @@
+"""Request size and per-message overhead of conversation state handling.
+
+Compares round-tripping the whole conversation_state in every request and
+response (the previous API) with sending only a session id and keeping
+the state in SessionStore, in memory and with sqlite write-through.
+Conversation state is simulated as a per-turn history, so its size grows
+with the length of the conversation.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.bench_sessions [--turns 1 10 50 200] [--repeat 200]
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.models.schemas import ChatRequest, ChatResponse
+from app.services.session_store import SessionStore
+from benchmarks.common import measure, print_json
+from pydantic import BaseModel
+
+
+class LegacyChatRequest(BaseModel):
+    message: str
+    user_id: str
+    conversation_state: Optional[Dict[str, Any]] = {}
+
+
+class LegacyChatResponse(BaseModel):
+    response: str
+    intent: str
+    confidence: float
+    conversation_state: Dict[str, Any]
+    timestamp: datetime
+
+
+MESSAGE = "Can I move my thai massage to tomorrow at 3pm?"
+REPLY = "Appointment #12 rescheduled successfully to 2025-01-16 15:00."
+
+
+def conversation_state(turns):
+    return {
+        "pending": "reschedule",
+        "history": [
+            {
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": MESSAGE if i % 2 == 0 else REPLY,
+                "intent": "reschedule_booking",
+            }
+            for i in range(turns)
+        ],
+    }
+
+
+def legacy_round_trip(request_body, state):
+    request = LegacyChatRequest.model_validate_json(request_body)
+    response = LegacyChatResponse(
+        response=REPLY,
+        intent="reschedule_booking",
+        confidence=0.97,
+        conversation_state=request.conversation_state or state,
+        timestamp=datetime.now(),
+    )
+    return response.model_dump_json()
+
+
+def session_round_trip(store, request_body, state):
+    request = ChatRequest.model_validate_json(request_body)
+    session = store.load(request.session_id)
+    session = store.save(session._replace(state=state))
+    response = ChatResponse(
+        response=REPLY,
+        intent="reschedule_booking",
+        confidence=0.97,
+        session_id=session.session_id,
+        timestamp=datetime.now(),
+    )
+    return response.model_dump_json()
+
+
+def bench_turns(turns, repeat, db_path):
+    state = conversation_state(turns)
+    legacy_request = LegacyChatRequest(
+        message=MESSAGE, user_id="bench-user", conversation_state=state
+    ).model_dump_json()
+    legacy_response = legacy_round_trip(legacy_request, state)
+
+    result = {
+        "turns": turns,
+        "legacy": {
+            "request_bytes": len(legacy_request),
+            "response_bytes": len(legacy_response),
+            "overhead": measure(
+                legacy_round_trip, [(legacy_request, state)], repeat
+            ),
+        },
+    }
+
+    for name, store in (
+        ("session_memory", SessionStore()),
+        ("session_sqlite", SessionStore(db_path=db_path)),
+    ):
+        session = store.save(store.new("bench-user")._replace(state=state))
+        request = ChatRequest(
+            message=MESSAGE, session_id=session.session_id
+        ).model_dump_json()
+        response = session_round_trip(store, request, state)
+        result[name] = {
+            "request_bytes": len(request),
+            "response_bytes": len(response),
+            "overhead": measure(
+                session_round_trip, [(store, request, state)], repeat
+            ),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--turns", type=int, nargs="+", default=[1, 10, 50, 200]
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sessions.db")
+        print_json(
+            [bench_turns(turns, args.repeat, db_path) for turns in args.turns]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Per-worker unique memory (USS) of the multi-process launch modes.
+
+Starts the backend twice with the same number of workers, once as
+``uvicorn --workers N`` (every worker loads its own model) and once with
+the pre-fork launcher ``python -m app.serve`` (the model is loaded once
+and shared), sends each the same chat traffic, and reads
+/proc/<pid>/smaps_rollup of every worker:
+
+    python -m benchmarks.bench_worker_memory [--workers 4] [--requests 200]
+
+USS (Private_Clean + Private_Dirty) is the memory a worker frees when it
+exits; PSS splits shared pages evenly between the processes mapping them,
+so the PSS total of master and workers is the memory the whole server
+really uses. Linux only. Any settings in the environment (MODEL_PATH,
+INFERENCE_BACKEND, ...) apply to both servers.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.common import (BACKEND_DIR, TRAINING_DATA, load_training_data,
+                               print_json)
+
+LAUNCHERS = {
+    "uvicorn_workers": [sys.executable, "-m", "uvicorn", "app.main:app"],
+    "prefork": [sys.executable, "-m", "app.serve"],
+}
+# Logged by every worker once its tools are loaded (or inherited)
+READY_LINE = "Tools ready"
+KB = 1024.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def smaps_rollup(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields
+
+
+def memory_mb(pid):
+    fields = smaps_rollup(pid)
+    return {
+        "uss_mb": (fields["Private_Clean"] + fields["Private_Dirty"]) / KB,
+        "pss_mb": fields["Pss"] / KB,
+        "rss_mb": fields["Rss"] / KB,
+    }
+
+
+def worker_pids(master_pid):
+    """Children of the master, minus multiprocessing helpers."""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == master_pid and b"resource_tracker" not in cmdline:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def chat(url, message, user_id):
+    request = urllib.request.Request(
+        f"{url}/api/v1/chat",
+        data=json.dumps({"message": message, "user_id": user_id}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+
+
+def wait_ready(log_path, process, workers, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited, see {log_path}")
+        with open(log_path) as f:
+            if f.read().count(READY_LINE) >= workers:
+                return
+        time.sleep(0.5)
+    raise TimeoutError(f"workers not ready after {timeout}s")
+
+
+def bench_launcher(name, args, messages, tmp):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    log_path = os.path.join(tmp, f"{name}.log")
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "APPOINTMENTS_DB_PATH": os.path.join(tmp, f"{name}.db"),
+    }
+    command = LAUNCHERS[name] + [
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(args.workers),
+    ]
+
+    started = time.perf_counter()
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            command, cwd=tmp, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        wait_ready(log_path, process, args.workers, args.timeout)
+        ready_s = time.perf_counter() - started
+        # Traffic makes every worker run the model and touch its pages
+        for i in range(args.requests):
+            chat(url, messages[i % len(messages)], f"mem-{i % 20}")
+        time.sleep(args.settle)
+
+        workers = [memory_mb(pid) for pid in worker_pids(process.pid)]
+        master = memory_mb(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    uss = [worker["uss_mb"] for worker in workers]
+    return {
+        "time_to_ready_s": ready_s,
+        "workers": len(workers),
+        "worker_uss_mb": uss,
+        "mean_worker_uss_mb": sum(uss) / len(uss) if uss else 0.0,
+        "master_uss_mb": master["uss_mb"],
+        "total_pss_mb": master["pss_mb"]
+        + sum(worker["pss_mb"] for worker in workers),
+        "total_rss_mb": master["rss_mb"]
+        + sum(worker["rss_mb"] for worker in workers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument(
+        "--launchers",
+        nargs="+",
+        choices=list(LAUNCHERS),
+        default=list(LAUNCHERS),
+    )
+    parser.add_argument("--data", default=TRAINING_DATA)
+    args = parser.parse_args()
+
+    messages = [example["text"] for example in load_training_data(args.data)]
+    with tempfile.TemporaryDirectory() as tmp:
+        result = {
+            name: bench_launcher(name, args, messages, tmp)
+            for name in args.launchers
+        }
+    if len(result) == len(LAUNCHERS):
+        before = result["uvicorn_workers"]
+        after = result["prefork"]
+        result["uss_saved_per_worker_mb"] = (
+            before["mean_worker_uss_mb"] - after["mean_worker_uss_mb"]
+        )
+        result["pss_saved_mb"] = before["total_pss_mb"] - after["total_pss_mb"]
+    print_json(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+import statistics
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(os.path.dirname(BACKEND_DIR))
+TRAINING_DATA = os.path.join(REPO_DIR, "notebooks", "training_data.json")
+SERVICES_CSV = os.path.join(REPO_DIR, "notebooks", "simple_dataset.csv")
+
+
+def load_training_data(path=TRAINING_DATA):
+    with open(path) as f:
+        return json.load(f)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_s):
+    samples_ms = [s * 1000.0 for s in samples_s]
+    return {
+        "count": len(samples_ms),
+        "mean_ms": statistics.fmean(samples_ms) if samples_ms else 0.0,
+        "p50_ms": percentile(samples_ms, 50),
+        "p90_ms": percentile(samples_ms, 90),
+        "p99_ms": percentile(samples_ms, 99),
+    }
+
+
+def measure(fn, args_list, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            started = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def print_json(result):
+    print(json.dumps(result, indent=2, sort_keys=True))
@@ -0,0 +1,103 @@
+"""Held-out accuracy and latency of the intent cascade.
+
+The TF-IDF tier is trained and calibrated on the training split only; the
+held-out split is then classified by DistilBERT alone, by the TF-IDF tier
+alone and by the cascade (TF-IDF, escalating to DistilBERT below the
+calibrated threshold).
+
+The shipped DistilBERT model was trained on the full dataset, so its
+held-out numbers are optimistic; the comparison of interest is cascade
+versus model-only accuracy, and the share of traffic the fast tier takes.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.eval_cascade [--test-size 0.25] [--seed 0]
+"""
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.tools.inference_tool import InferenceTool
+from app.tools.intent_cascade import IntentCascade
+from benchmarks.common import (TRAINING_DATA, load_training_data, print_json,
+                               summarize)
+from sklearn.model_selection import train_test_split
+
+
+def accuracy(predicted, labels):
+    correct = sum(p == label for p, label in zip(predicted, labels))
+    return correct / len(labels) if labels else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=TRAINING_DATA)
+    parser.add_argument("--test-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--target-precision",
+        type=float,
+        default=settings.intent_cascade_target_precision,
+    )
+    args = parser.parse_args()
+
+    examples = load_training_data(args.data)
+    texts = [example["text"] for example in examples]
+    labels = [example["intent"] for example in examples]
+    train_x, test_x, train_y, test_y = train_test_split(
+        texts,
+        labels,
+        test_size=args.test_size,
+        stratify=labels,
+        random_state=args.seed,
+    )
+
+    settings.intent_cascade_enabled = False
+    settings.inference_batching_enabled = False
+    tool = InferenceTool()
+    cascade = IntentCascade(
+        train_x, train_y, target_precision=args.target_precision
+    )
+
+    model_only, model_samples = [], []
+    for text in test_x:
+        started = time.perf_counter()
+        model_only.append(tool.predict_intents([text])[0][0])
+        model_samples.append(time.perf_counter() - started)
+
+    fast_only = [str(label) for label in cascade.pipeline.predict(test_x)]
+
+    cascaded, cascade_samples, fast_hits = [], [], 0
+    for text in test_x:
+        started = time.perf_counter()
+        result = cascade.predict([text])[0]
+        if result is None:
+            result = tool.predict_intents([text])[0]
+        else:
+            fast_hits += 1
+        cascade_samples.append(time.perf_counter() - started)
+        cascaded.append(result[0])
+
+    print_json(
+        {
+            "train_size": len(train_x),
+            "test_size": len(test_x),
+            "threshold": cascade.threshold,
+            "target_precision": args.target_precision,
+            "cv_accuracy": cascade.cv_accuracy,
+            "fast_tier_hit_rate": fast_hits / len(test_x),
+            "accuracy": {
+                "model_only": accuracy(model_only, test_y),
+                "fast_only": accuracy(fast_only, test_y),
+                "cascade": accuracy(cascaded, test_y),
+            },
+            "latency": {
+                "model_only": summarize(model_samples),
+                "cascade": summarize(cascade_samples),
+            },
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Score distribution behind the semantic search threshold.
+
+Embeds the catalog the way DataTool does (service name and description)
+and reports the top score of queries that describe a service without
+naming it, and of the unspecific queries the threshold is calibrated on.
+A good encoder separates the two; the report shows how many descriptive
+queries clear the calibrated threshold and whether they hit the right
+service.
+
+Scoring the index alone skips the lexical catalog match that runs before
+it, so the "retrieve" section also sends every query through
+DataTool.retrieve_and_generate and reports the service it answered with.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.eval_semantic_threshold [--csv PATH]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+
+from app.core.config import settings
+from app.tools.data_tool import UNSPECIFIC_QUERIES, DataTool
+from app.tools.inference_tool import InferenceTool
+from app.tools.service_catalog import ServiceCatalog
+from benchmarks.common import SERVICES_CSV, print_json
+
+DESCRIPTIVE_QUERIES = {
+    "something with heated stones": "Hot Stone Massage",
+    "i'd like the one with essential oils": "Aromatherapy Massage",
+    "what can i get while expecting a baby": "Prenatal Massage",
+    "i run marathons, what do you recommend": "Sports Massage",
+    "traditional stretching treatment": "Thai Massage",
+    "my upper body is stiff": "Neck and Shoulder Massage",
+    "intense relief for sore muscles": "Deep Tissue Massage",
+    "pressure points on my feet": "Reflexology",
+    "the one with warm rocks": "Hot Stone Massage",
+    "price of the one with heated stones": "Hot Stone Massage",
+    "what is the cost for pregnant women": "Prenatal Massage",
+}
+
+# Unspecific queries that mention a generic name word; they must not be
+# answered with a service
+GENERIC_QUERIES = (
+    "how much is the massage",
+    "what is the price",
+)
+
+
+def distribution(hits):
+    scores = [hit["score"] for hit in hits.values()]
+    return {
+        "min": min(scores),
+        "mean": statistics.fmean(scores),
+        "max": max(scores),
+    }
+
+
+def top_hits(index, queries):
+    return {
+        query: {"key": hit.key, "score": hit.score}
+        for query in queries
+        for hit in index.search(query)[:1]
+    }
+
+
+def retrieved(tool, names, queries):
+    """Service each query is answered with, None for the not-found reply."""
+    return {
+        query: names.get(tool.retrieve_and_generate(query))
+        for query in queries
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=SERVICES_CSV)
+    args = parser.parse_args()
+
+    settings.semantic_min_score = None
+    settings.intent_cascade_enabled = False
+    inference = InferenceTool()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Copied so that the embedding cache is not written next to --csv
+        csv_path = os.path.join(tmp, os.path.basename(args.csv))
+        shutil.copyfile(args.csv, csv_path)
+        tool = DataTool(
+            csv_path,
+            embedder=inference.embed,
+            model_version=inference.model_version,
+        )
+        index = tool.semantic_index
+        threshold = tool.semantic_threshold
+        descriptive = top_hits(index, DESCRIPTIVE_QUERIES)
+        unspecific = top_hits(index, UNSPECIFIC_QUERIES)
+        names = {
+            record.describe(): record.name
+            for record in ServiceCatalog.from_csv(csv_path).records
+        }
+        answered = retrieved(tool, names, DESCRIPTIVE_QUERIES)
+        answered_unspecific = retrieved(
+            tool, names, UNSPECIFIC_QUERIES + GENERIC_QUERIES
+        )
+
+    accepted = {
+        query: hit
+        for query, hit in descriptive.items()
+        if hit["score"] > threshold
+    }
+    print_json(
+        {
+            "threshold": threshold,
+            "descriptive": {
+                "scores": distribution(descriptive),
+                "accepted": len(accepted),
+                "accepted_correct": sum(
+                    hit["key"] == DESCRIPTIVE_QUERIES[query]
+                    for query, hit in accepted.items()
+                ),
+                "queries": descriptive,
+            },
+            "unspecific": {
+                "scores": distribution(unspecific),
+                "queries": unspecific,
+            },
+            "retrieve": {
+                "descriptive_correct": sum(
+                    name == DESCRIPTIVE_QUERIES[query]
+                    for query, name in answered.items()
+                ),
+                "descriptive_total": len(answered),
+                "unspecific_answered": sum(
+                    name is not None for name in answered_unspecific.values()
+                ),
+                "queries": {**answered, **answered_unspecific},
+            },
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
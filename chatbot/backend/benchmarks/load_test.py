@@ -0,0 +1,104 @@
+"""Measure /health and /chat latency while /chat is under load.
+
+Point it at a running backend, once on the build before a change and once
+after, and compare the reported percentiles:
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_test --url http://localhost:8000 \\
+        --concurrency 200 --duration 30
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import httpx
+from benchmarks.common import (TRAINING_DATA, load_training_data,
+                               print_json, summarize)
+
+
+async def chat_worker(client, worker_id, messages, deadline, samples, errors):
+    session_id = None
+    for i in itertools.count():
+        if time.perf_counter() >= deadline:
+            return
+        payload = {
+            "message": messages[(worker_id + i) % len(messages)],
+            "user_id": f"load-test-{worker_id}",
+            "session_id": session_id,
+        }
+        started = time.perf_counter()
+        try:
+            response = await client.post("/api/v1/chat", json=payload)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors.append(1)
+            continue
+        samples.append(time.perf_counter() - started)
+        session_id = response.json()["session_id"]
+
+
+async def health_prober(client, deadline, interval, samples, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get("/health")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors.append(1)
+        else:
+            samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    messages = [example["text"] for example in load_training_data(args.data)]
+    limits = httpx.Limits(max_connections=args.concurrency + 8)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=args.timeout
+    ) as client:
+        deadline = time.perf_counter() + args.duration
+        chat_samples, chat_errors = [], []
+        health_samples, health_errors = [], []
+        await asyncio.gather(
+            health_prober(
+                client,
+                deadline,
+                args.health_interval,
+                health_samples,
+                health_errors,
+            ),
+            *(
+                chat_worker(
+                    client, i, messages, deadline, chat_samples, chat_errors
+                )
+                for i in range(args.concurrency)
+            ),
+        )
+
+    return {
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "chat": {
+            **summarize(chat_samples),
+            "errors": len(chat_errors),
+            "throughput_rps": len(chat_samples) / args.duration,
+        },
+        "health": {**summarize(health_samples), "errors": len(health_errors)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--data", default=TRAINING_DATA)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--health-interval", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    print_json(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
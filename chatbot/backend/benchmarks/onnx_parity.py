@@ -0,0 +1,82 @@
+"""Check the quantized ONNX backend against the torch backend.
+
+Reports intent agreement, the max confidence delta and per-query latency
+of both backends on the training set.
+
+Usage (from chatbot/backend):
+    python -m benchmarks.onnx_parity [--data PATH] [--batch-size 1]
+"""
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.tools.inference_tool import InferenceTool
+from benchmarks.common import (TRAINING_DATA, load_training_data,
+                               print_json, summarize)
+
+
+def run_backend(tool, texts, labels, batch_size):
+    tool.predict_intents(texts[:batch_size])  # warm-up
+    predictions = []
+    samples = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start : start + batch_size]
+        started = time.perf_counter()
+        predictions.extend(tool.predict_intents(chunk))
+        samples.append((time.perf_counter() - started) / len(chunk))
+
+    correct = sum(
+        1 for (intent, _), label in zip(predictions, labels) if intent == label
+    )
+    return predictions, {
+        "accuracy": correct / len(labels),
+        "per_query": summarize(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=TRAINING_DATA)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    examples = load_training_data(args.data)
+    texts = [example["text"] for example in examples]
+    labels = [example["intent"] for example in examples]
+
+    settings.inference_batching_enabled = False
+    settings.inference_backend = "torch"
+    tool = InferenceTool()
+    torch_predictions, torch_report = run_backend(
+        tool, texts, labels, args.batch_size
+    )
+
+    settings.inference_backend = "onnx"
+    tool.backend = tool._build_backend(tool.model, tool.model_version)
+    onnx_predictions, onnx_report = run_backend(
+        tool, texts, labels, args.batch_size
+    )
+
+    agreement = sum(
+        1
+        for (a, _), (b, _) in zip(torch_predictions, onnx_predictions)
+        if a == b
+    )
+    print_json(
+        {
+            "examples": len(texts),
+            "onnx_path": tool.backend.onnx_path,
+            "torch": torch_report,
+            "onnx": onnx_report,
+            "intent_agreement": agreement / len(texts),
+            "max_confidence_delta": max(
+                abs(a - b)
+                for (_, a), (_, b) in zip(torch_predictions, onnx_predictions)
+            ),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
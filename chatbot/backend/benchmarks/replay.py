@@ -0,0 +1,246 @@
+"""Replay messages through the chat workflow; report speed and accuracy.
+
+Streams the training data, or JSONL transcripts, through
+ChatbotService.process_message in a pool of worker processes and reports
+messages per second, latency percentiles, intent accuracy, per-intent
+precision and recall, and a confusion matrix:
+
+    python -m benchmarks.replay [FILE ...] [--workers 4] \\
+        [--output replay-results.json]
+
+Input files are either JSON lists of {"text", "intent"} examples, like
+notebooks/training_data.json (the default), where every example is a
+conversation of its own, or JSONL transcripts with one message per line:
+{"message", "intent", "user_id"} where only "message" (or "text") is
+required. Lines with the same user_id are one conversation: they run in
+order, in one worker, in the same session.
+
+The tools are loaded once and the workers forked from it, as with
+app.serve. Appointments go to a temporary sqlite database. Settings from
+the environment (MODEL_PATH, INFERENCE_BACKEND, INTENT_CACHE_SIZE, ...)
+apply, and the ones that affect the results are written to the output
+file along with the metrics and every error and misclassified message,
+so that runs can be compared.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from app.core.config import settings
+from app.serve import init_worker, preload, worker_torch_threads
+from app.services.chatbot_service import ChatbotService
+from app.tools.registry import registry
+from benchmarks.common import TRAINING_DATA, print_json, summarize
+
+# Settings recorded with the results
+RUN_SETTINGS = (
+    "model_path",
+    "inference_mode",
+    "inference_backend",
+    "inference_padding",
+    "inference_batching_enabled",
+    "intent_cascade_enabled",
+    "intent_cascade_target_precision",
+    "intent_cache_size",
+    "semantic_search_enabled",
+)
+
+_service = None
+
+
+def load_conversations(paths):
+    """Lists of (index, message, user_id, expected intent), in order."""
+    conversations = {}
+    index = 0
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path) as f:
+                items = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(path) as f:
+                items = json.load(f)
+        for item in items:
+            message = item.get("message", item.get("text"))
+            user_id = item.get("user_id")
+            key = ("user", user_id) if user_id else ("message", index)
+            conversations.setdefault(key, []).append(
+                (index, message, user_id, item.get("intent"))
+            )
+            index += 1
+    return list(conversations.values())
+
+
+def init_replay_worker(torch_threads):
+    global _service
+    init_worker(torch_threads)
+    _service = ChatbotService()
+
+
+def replay_conversation(conversation):
+    records = []
+    session_id = None
+    for index, message, user_id, expected in conversation:
+        record = {"index": index, "message": message, "expected": expected}
+        started = time.perf_counter()
+        try:
+            response = _service.process_message(message, user_id, session_id)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        else:
+            session_id = response.session_id
+            record["intent"] = response.intent
+            record["confidence"] = response.confidence
+        record["latency_s"] = time.perf_counter() - started
+        records.append(record)
+    return records
+
+
+def confusion_matrix(records):
+    matrix = defaultdict(Counter)
+    for record in records:
+        if record["expected"] is not None and "intent" in record:
+            matrix[record["expected"]][record["intent"]] += 1
+    return {
+        expected: dict(sorted(predicted.items()))
+        for expected, predicted in sorted(matrix.items())
+    }
+
+
+def per_intent(matrix):
+    predicted_totals = Counter()
+    for predicted in matrix.values():
+        predicted_totals.update(predicted)
+    labels = sorted(set(matrix) | set(predicted_totals))
+    result = {}
+    for label in labels:
+        correct = matrix.get(label, {}).get(label, 0)
+        support = sum(matrix.get(label, {}).values())
+        result[label] = {
+            "support": support,
+            "precision": (
+                correct / predicted_totals[label]
+                if predicted_totals[label]
+                else 0.0
+            ),
+            "recall": correct / support if support else 0.0,
+        }
+    return result
+
+
+def format_matrix(matrix):
+    """The confusion matrix as a text table, expected intents as rows."""
+    labels = sorted(
+        set(matrix) | {label for row in matrix.values() for label in row}
+    )
+    width = max([len(label) for label in labels] + [8])
+    columns = [str(i) for i in range(len(labels))]
+    # Same prefix as a row: label, space, row number, space
+    lines = [
+        f"{'':<{width}} {'':>4} " + " ".join(f"{c:>4}" for c in columns),
+    ]
+    for i, label in enumerate(labels):
+        row = matrix.get(label, {})
+        cells = " ".join(f"{row.get(other, 0):>4}" for other in labels)
+        lines.append(f"{label:<{width}} {i:>4} {cells}")
+    return "\n".join(lines)
+
+
+def summarize_run(records, seconds):
+    labelled = [record for record in records if record["expected"] is not None]
+    correct = sum(
+        record.get("intent") == record["expected"] for record in labelled
+    )
+    matrix = confusion_matrix(records)
+    return {
+        "messages": len(records),
+        "seconds": seconds,
+        "messages_per_s": len(records) / seconds if seconds else 0.0,
+        "latency": summarize([record["latency_s"] for record in records]),
+        "accuracy": correct / len(labelled) if labelled else None,
+        "labelled": len(labelled),
+        "error_count": sum("error" in record for record in records),
+        "per_intent": per_intent(matrix),
+        "confusion_matrix": matrix,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("files", nargs="*", default=[TRAINING_DATA])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default="replay-results.json")
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+    conversations = load_conversations(args.files)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.appointments_db_path = os.path.join(tmp, "appointments.db")
+        settings.session_db_path = None
+        started = time.perf_counter()
+        preload()
+        load_s = time.perf_counter() - started
+
+        context = multiprocessing.get_context("fork")
+        with context.Pool(
+            workers,
+            initializer=init_replay_worker,
+            initargs=(worker_torch_threads(workers),),
+        ) as pool:
+            started = time.perf_counter()
+            records = [
+                record
+                for conversation in pool.imap_unordered(
+                    replay_conversation, conversations
+                )
+                for record in conversation
+            ]
+            seconds = time.perf_counter() - started
+    records.sort(key=lambda record: record["index"])
+
+    summary = summarize_run(records, seconds)
+    result = {
+        "run": {
+            "started_at": started_at,
+            "files": args.files,
+            "workers": workers,
+            "conversations": len(conversations),
+            "load_s": load_s,
+            "model_version": list(registry.inference.model_version),
+            "settings": settings.model_dump(include=set(RUN_SETTINGS)),
+        },
+        **summary,
+        "errors": [record for record in records if "error" in record],
+        "misclassified": [
+            record
+            for record in records
+            if record["expected"] is not None
+            and "intent" in record
+            and record["intent"] != record["expected"]
+        ],
+    }
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+    print(format_matrix(summary["confusion_matrix"]), file=sys.stderr)
+    print_json(
+        {
+            key: value
+            for key, value in summary.items()
+            if key not in ("confusion_matrix", "per_intent")
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
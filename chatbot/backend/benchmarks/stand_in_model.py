@@ -0,0 +1,79 @@
+"""A tiny randomly initialized intent model for offline benchmarking.
+
+Builds a model artifact (see app.tools.model_artifact) with the real
+intent labels, a 2-layer, 32-dimensional DistilBERT and a WordPiece
+vocabulary of the words in the training data and the service catalog, so
+that nothing is downloaded. Its predictions are meaningless but its code
+path is the real one, and it runs on CI-class CPUs in milliseconds:
+
+    python -m benchmarks.stand_in_model OUTPUT_DIR [--seed 0]
+
+The same seed always gives the same weights.
+"""
+
+import argparse
+import csv
+import os
+import re
+
+import torch
+from app.tools.model_artifact import save_artifact
+from benchmarks.common import SERVICES_CSV, TRAINING_DATA, load_training_data
+from transformers import (DistilBertConfig,
+                          DistilBertForSequenceClassification,
+                          DistilBertTokenizer)
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def build_vocab(texts):
+    words = {word for text in texts for word in _WORD_RE.findall(text.lower())}
+    return SPECIAL_TOKENS + sorted(words)
+
+
+def build_stand_in_model(
+    path, seed=0, data_path=TRAINING_DATA, csv_path=SERVICES_CSV
+):
+    examples = load_training_data(data_path)
+    with open(csv_path, newline="") as f:
+        services = [row["Massage_Type"] for row in csv.DictReader(f)]
+
+    os.makedirs(path, exist_ok=True)
+    vocab_path = os.path.join(path, "vocab.txt")
+    vocab = build_vocab([example["text"] for example in examples] + services)
+    with open(vocab_path, "w") as f:
+        f.write("\n".join(vocab) + "\n")
+    tokenizer = DistilBertTokenizer(vocab_path)
+
+    intents = sorted({example["intent"] for example in examples})
+    label_encoder = {intent: i for i, intent in enumerate(intents)}
+    config = DistilBertConfig(
+        vocab_size=len(vocab),
+        dim=32,
+        hidden_dim=64,
+        n_layers=2,
+        n_heads=2,
+        max_position_embeddings=128,
+        num_labels=len(intents),
+        id2label={i: intent for intent, i in label_encoder.items()},
+        label2id=label_encoder,
+    )
+    torch.manual_seed(seed)
+    model = DistilBertForSequenceClassification(config)
+    model.eval()
+    save_artifact(path, model, tokenizer, label_encoder)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output_path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    build_stand_in_model(args.output_path, seed=args.seed)
+    print(f"Stand-in model written to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Local client for the streaming chat endpoints.
+
+Sends the same conversation through /chat, /chat/stream (SSE) and
+/chat/ws (one WebSocket for all messages) and reports, per transport,
+the time to the first event (the intent), to the first response text
+and to the end of each message:
+
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.stream_client --url http://localhost:8000
+
+Pass --show to print the events of each message as they arrive.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import websockets
+from benchmarks.common import print_json, summarize
+
+CONVERSATION = [
+    "Hi there",
+    "How much is a hot stone massage?",
+    "Book a thai massage tomorrow at 3pm",
+    "What's my booking status?",
+    "Please reschedule it to Friday at 11am",
+    "Cancel my appointment",
+    "Thanks!",
+]
+
+
+class Timings:
+    def __init__(self):
+        self.first_event = []
+        self.first_response = []
+        self.total = []
+
+    def record(self, started, events):
+        """Record (arrival time, event) pairs of one message."""
+        self.first_event.append(events[0][0] - started)
+        self.first_response.append(
+            next(t for t, e in events if e["event"] in ("response", "done"))
+            - started
+        )
+        self.total.append(events[-1][0] - started)
+
+    def summary(self):
+        return {
+            "first_event": summarize(self.first_event),
+            "first_response": summarize(self.first_response),
+            "total": summarize(self.total),
+        }
+
+
+def show(transport, events):
+    for _, event in events:
+        print(f"[{transport}] {json.dumps(event)}")
+
+
+async def run_plain(client, messages, user_id, verbose):
+    timings, session_id = Timings(), None
+    for message in messages:
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/chat",
+            json={
+                "message": message,
+                "user_id": user_id,
+                "session_id": session_id,
+            },
+        )
+        response.raise_for_status()
+        body = response.json()
+        events = [(time.perf_counter(), {"event": "done", **body})]
+        session_id = body["session_id"]
+        timings.record(started, events)
+        if verbose:
+            show("chat", events)
+    return timings
+
+
+async def run_sse(client, messages, user_id, verbose):
+    timings, session_id = Timings(), None
+    for message in messages:
+        started = time.perf_counter()
+        events = []
+        async with client.stream(
+            "POST",
+            "/api/v1/chat/stream",
+            json={
+                "message": message,
+                "user_id": user_id,
+                "session_id": session_id,
+            },
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    event = json.loads(line[len("data: ") :])
+                    events.append((time.perf_counter(), event))
+        session_id = events[-1][1].get("session_id", session_id)
+        timings.record(started, events)
+        if verbose:
+            show("sse", events)
+    return timings
+
+
+async def run_websocket(url, messages, user_id, verbose):
+    timings = Timings()
+    ws_url = url.replace("http", "ws", 1) + "/api/v1/chat/ws"
+    async with websockets.connect(ws_url) as ws:
+        for message in messages:
+            started = time.perf_counter()
+            events = []
+            await ws.send(json.dumps({"message": message, "user_id": user_id}))
+            while True:
+                event = json.loads(await ws.recv())
+                events.append((time.perf_counter(), event))
+                if event["event"] in ("done", "error"):
+                    break
+            timings.record(started, events)
+            if verbose:
+                show("ws", events)
+    return timings
+
+
+async def run(args):
+    messages = CONVERSATION * args.rounds
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout
+    ) as client:
+        plain = await run_plain(client, messages, "stream-plain", args.show)
+        sse = await run_sse(client, messages, "stream-sse", args.show)
+    ws = await run_websocket(args.url, messages, "stream-ws", args.show)
+    return {
+        "messages": len(messages),
+        "chat": plain.summary(),
+        "sse": sse.summary(),
+        "websocket": ws.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--show", action="store_true")
+    print_json(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
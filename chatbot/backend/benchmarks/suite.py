@@ -0,0 +1,331 @@
+"""Microbenchmarks and an in-process HTTP load test, as a regression gate.
+
+Two parts:
+
+- micro: per-call latency of InferenceTool.predict_intent (full path) and
+  predict_intents (the model alone, batches of 1 and 32),
+  extract_datetime, DataTool.retrieve_and_generate and every
+  AppointmentTool method, called directly.
+- load: --requests requests from --concurrency clients against the FastAPI
+  app in this process (no sockets), a seeded mix of /chat, /services and
+  /appointments/{user_id} weighted by --mix.
+
+With --stand-in the intent model is a tiny randomly initialized DistilBERT
+(see benchmarks.stand_in_model), so the suite runs offline on CI-class
+CPUs; otherwise MODEL_PATH or the default model is used. The catalog and
+training data come from notebooks/, appointments go to a temporary
+database, inference is local and the intent cache is off, so that every
+call does the work it measures. Workloads are seeded and the output is
+sorted and rounded, so two runs differ only in their timings:
+
+    python -m benchmarks.suite --stand-in --output baseline.json
+    python -m benchmarks.suite --stand-in --baseline baseline.json
+
+With --baseline, every mean, p50 and p90 latency that grew, or throughput
+that fell, by more than --tolerance (a fraction) is listed on stderr and
+the exit status is 1.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import torch
+from app.core.config import settings
+from app.main import app
+from app.tools.registry import registry
+from benchmarks.bench_data_tool import QUERIES
+from benchmarks.bench_datetime import CORPUS, REFERENCE
+from benchmarks.common import (SERVICES_CSV, TRAINING_DATA, load_training_data,
+                               measure, print_json, summarize)
+from benchmarks.stand_in_model import build_stand_in_model
+
+ENDPOINTS = ("chat", "services", "appointments")
+DEFAULT_MIX = "chat=6,services=2,appointments=2"
+USERS = 50
+APPOINTMENTS_PER_USER = 5
+LOAD_WARMUP_REQUESTS = 20
+
+# Compared against the baseline; lower is better except for *_per_s
+GATED_METRICS = ("mean_ms", "p50_ms", "p90_ms", "requests_per_s")
+# Latency changes smaller than this are noise, whatever the ratio
+MIN_DELTA_MS = 0.05
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def configure(tmp, stand_in, seed):
+    # The catalog is copied so that its embedding cache is written there
+    csv_path = os.path.join(tmp, "services.csv")
+    shutil.copyfile(SERVICES_CSV, csv_path)
+    settings.services_csv_path = csv_path
+    settings.intent_cascade_data_path = TRAINING_DATA
+    settings.appointments_db_path = os.path.join(tmp, "appointments.db")
+    settings.inference_mode = "local"
+    settings.intent_cache_size = 0
+    if stand_in:
+        settings.model_path = build_stand_in_model(
+            os.path.join(tmp, "model"), seed=seed
+        )
+
+
+def seed_appointments(appointments, users):
+    ids = []
+    for user in users:
+        for _ in range(APPOINTMENTS_PER_USER):
+            ids.append(
+                appointments.create_appointment(
+                    user, "Thai Massage", "2025-01-16 15:00"
+                )
+            )
+    return ids
+
+
+def run_micro(messages, repeat):
+    inference = registry.inference
+    appointments = registry.appointments
+    users = [f"micro-user-{i}" for i in range(USERS)]
+    ids = seed_appointments(appointments, users)
+
+    single = [(message,) for message in messages]
+    batches = [(messages[i : i + 32],) for i in range(0, len(messages), 32)]
+    user_args = [(user,) for user in users]
+    bookings = [(user, "Thai Massage", "2025-01-16 15:00") for user in users]
+    return {
+        "inference.predict_intent": measure(
+            inference.predict_intent, single, repeat
+        ),
+        "inference.predict_intents.batch_1": measure(
+            inference.predict_intents, [([m],) for (m,) in single], repeat
+        ),
+        "inference.predict_intents.batch_32": measure(
+            inference.predict_intents, batches, repeat
+        ),
+        "inference.extract_datetime": measure(
+            inference.extract_datetime,
+            [(text, REFERENCE) for text, _ in CORPUS],
+            repeat,
+        ),
+        "data.retrieve_and_generate": measure(
+            registry.data.retrieve_and_generate,
+            [(query,) for query in QUERIES],
+            repeat,
+        ),
+        "appointments.create_appointment": measure(
+            appointments.create_appointment, bookings, repeat
+        ),
+        "appointments.add_appointment": measure(
+            appointments.add_appointment, bookings, repeat
+        ),
+        "appointments.get_appointments": measure(
+            appointments.get_appointments, user_args, repeat
+        ),
+        "appointments.get_latest_pending_appointment": measure(
+            appointments.get_latest_pending_appointment, user_args, repeat
+        ),
+        "appointments.get_appointment_summary": measure(
+            appointments.get_appointment_summary, user_args, repeat
+        ),
+        "appointments.reschedule_appointment": measure(
+            appointments.reschedule_appointment,
+            [(i, "2025-01-17 10:00") for i in ids],
+            repeat,
+        ),
+        "appointments.cancel_appointment": measure(
+            appointments.cancel_appointment, [(i,) for i in ids], repeat
+        ),
+    }
+
+
+def plan_requests(messages, mix, count, seed):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    plan = []
+    for name in rng.choices(names, weights=weights, k=count):
+        user = f"load-user-{rng.randrange(USERS)}"
+        if name == "chat":
+            body = {"message": rng.choice(messages), "user_id": user}
+            plan.append((name, "POST", "/api/v1/chat", body))
+        elif name == "services":
+            plan.append((name, "GET", "/api/v1/services", None))
+        else:
+            plan.append((name, "GET", f"/api/v1/appointments/{user}", None))
+    return plan
+
+
+async def send_all(client, plan, concurrency, samples=None, statuses=None):
+    pending = iter(plan)
+
+    async def worker():
+        for name, method, path, body in pending:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            if samples is not None:
+                samples[name].append(time.perf_counter() - started)
+                statuses[name][str(response.status_code)] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_load(app, messages, mix, count, concurrency, seed):
+    plan = plan_requests(messages, mix, count, seed)
+    samples = defaultdict(list)
+    statuses = defaultdict(Counter)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://suite", timeout=None
+    ) as client:
+        await send_all(client, plan[:LOAD_WARMUP_REQUESTS], concurrency)
+        started = time.perf_counter()
+        await send_all(client, plan, concurrency, samples, statuses)
+        seconds = time.perf_counter() - started
+    return {
+        "requests": count,
+        "concurrency": concurrency,
+        "requests_per_s": count / seconds,
+        "endpoints": {
+            name: {
+                "latency": summarize(samples[name]),
+                "status": dict(sorted(statuses[name].items())),
+            }
+            for name in sorted(samples)
+        },
+    }
+
+
+def rounded(value, digits=3):
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {key: rounded(item, digits) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [rounded(item, digits) for item in value]
+    return value
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}{key}/")
+    else:
+        yield prefix.rstrip("/"), value
+
+
+def compare(result, baseline, tolerance):
+    """Gated metrics that regressed by more than ``tolerance``."""
+    previous = dict(flatten({k: baseline.get(k) for k in ("micro", "load")}))
+    regressions = {}
+    for key, value in flatten({k: result[k] for k in ("micro", "load")}):
+        metric = key.rsplit("/", 1)[-1]
+        old = previous.get(key)
+        if metric not in GATED_METRICS or not old or value is None:
+            continue
+        if metric.endswith("_per_s"):
+            change = old / value - 1 if value else float("inf")
+        elif value - old < MIN_DELTA_MS:
+            continue
+        else:
+            change = value / old - 1
+        if change > tolerance:
+            regressions[key] = {
+                "baseline": old,
+                "current": value,
+                "change": round(change, 3),
+            }
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--stand-in", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--skip", choices=("micro", "load"), default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    messages = [example["text"] for example in load_training_data()]
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(tmp, args.stand_in, args.seed)
+        registry.start()
+        result = {
+            "config": {
+                "stand_in": args.stand_in,
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "mix": args.mix,
+            },
+            "environment": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "torch": torch.__version__,
+                "torch_threads": torch.get_num_threads(),
+                "inference_backend": settings.inference_backend,
+            },
+            "micro": {},
+            "load": {},
+        }
+        if args.skip != "micro":
+            result["micro"] = run_micro(messages, args.repeat)
+        if args.skip != "load":
+            result["load"] = asyncio.run(
+                run_load(
+                    app,
+                    messages,
+                    args.mix,
+                    args.requests,
+                    args.concurrency,
+                    args.seed,
+                )
+            )
+    result = rounded(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+            f.write("\n")
+    else:
+        print_json(result)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(
+                json.dumps(regressions, indent=2, sort_keys=True),
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
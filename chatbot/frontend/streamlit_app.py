@@ -24,8 +24,10 @@ if "messages" not in st.session_state:
 if "user_id" not in st.session_state:
     st.session_state.user_id = str(uuid.uuid4())
 
-if "conversation_state" not in st.session_state:
-    st.session_state.conversation_state = {}
+# Conversation state lives on the server; the client only keeps the
+# session id it was given
+if "session_id" not in st.session_state:
+    st.session_state.session_id = None
 
 if "processing_message" not in st.session_state:
     st.session_state.processing_message = False
@@ -68,27 +70,28 @@ def get_all_massage_types():
         return []
 
 
-def send_message(message: str):
+def stream_message(message: str):
+    """Yield chat events from the backend as they arrive (SSE)."""
     try:
         payload = {
             "message": message,
             "user_id": st.session_state.user_id,
-            "conversation_state": st.session_state.conversation_state,
+            "session_id": st.session_state.session_id,
         }
 
-        response = requests.post(
-            f"{API_BASE_URL}/chat",
+        with requests.post(
+            f"{API_BASE_URL}/chat/stream",
             json=payload,
             headers={"Content-Type": "application/json"},
-        )
-
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data: "):
+                    yield json.loads(line[len("data: ") :])
     except Exception as e:
         st.error(f"Failed to send message: {e}")
-        return None
 
 # Sidebar
 with st.sidebar:
@@ -121,7 +124,7 @@ with st.sidebar:
     # Reset chat
     if st.button("🔄 New Chat"):
         st.session_state.messages = []
-        st.session_state.conversation_state = {}
+        st.session_state.session_id = None
 
     
     # Show available services
@@ -199,38 +202,53 @@ if prompt := st.chat_input("Type your message here..."):
         with st.chat_message("user"):
             st.write(prompt)
 
-        # Send message to backend
+        # Send message to backend and render events as they arrive
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                result = send_message(prompt)
-
-                if result:
-                    response = result["response"]
-                    intent = result["intent"]
-                    confidence = result["confidence"]
-
-                    # Update conversation state
-                    st.session_state.conversation_state = result.get(
-                        "conversation_state", {}
+            status = st.empty()
+            text = st.empty()
+            status.caption("Thinking...")
+            result = None
+
+            for event in stream_message(prompt):
+                if event["event"] == "intent":
+                    status.caption(
+                        f"Intent: {event['intent']} "
+                        f"({event['confidence']:.0%})"
                     )
-
-                    st.write(response)
-
-                    # Add to message history
-                    st.session_state.messages.append(
-                        {
-                            "role": "assistant",
-                            "content": response,
-                            "metadata": {
-                                "intent": intent,
-                                "confidence": confidence,
-                            },
-                        }
-                    )
-                else:
-                    st.error(
-                        "Failed to get response from chatbot. Please try again."
+                elif event["event"] == "response":
+                    text.write(event["text"])
+                elif event["event"] == "booking":
+                    st.success(
+                        f"Appointment #{event['appointment_id']}: "
+                        f"{event['action'].replace('_', ' ')} "
+                        f"({event['datetime']})"
                     )
+                elif event["event"] == "done":
+                    result = event
+                elif event["event"] == "error":
+                    st.error(event["detail"])
+
+            if result:
+                status.empty()
+
+                # Keep the session for the next message
+                st.session_state.session_id = result.get("session_id")
+
+                # Add to message history
+                st.session_state.messages.append(
+                    {
+                        "role": "assistant",
+                        "content": result["response"],
+                        "metadata": {
+                            "intent": result["intent"],
+                            "confidence": result["confidence"],
+                        },
+                    }
+                )
+            else:
+                st.error(
+                    "Failed to get response from chatbot. Please try again."
+                )
 
         st.session_state.processing_message = False
 